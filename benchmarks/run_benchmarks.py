@@ -0,0 +1,190 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+
+from modules.graph_analysis import GraphAnalyzer, METRICS
+from modules.graph_calculator import GraphCalculator
+from modules.graph_plotter import GraphPlotter
+from modules.symbolic import clear_symbolic_cache
+
+WorldCoords = Tuple[float, float, float, float]
+# A stage gets a fresh calculator, does its untimed setup and returns the call to time.
+Stage = Callable[["CountingCalculator"], Callable[[], Any]]
+
+CORPUS: Dict[str, List[Tuple[str, WorldCoords]]] = {
+    "polynomial": [
+        ("x**2 - 4", (-10, -10, 10, 10)),
+        ("x**5 - 3*x**3 + x - 1", (-3, -10, 3, 10)),
+    ],
+    "trigonometric": [
+        ("sin(x)", (-10, -10, 10, 10)),
+        ("sin(x) * cos(3*x) + 0.5*sin(7*x)", (-10, -10, 10, 10)),
+    ],
+    # The curves from little_turtle.py: fast oscillation with growing amplitude.
+    "oscillating": [
+        ("x**3 * sin(x**2)", (-10, -100, 10, 100)),
+        ("x**2 * cos(x)", (-10, -100, 10, 100)),
+        ("x * sin(x**3)", (-10, -10, 10, 10)),
+    ],
+    "poles": [
+        ("tan(x)", (-10, -10, 10, 10)),
+        ("1 / (x**2 - 1)", (-5, -10, 5, 10)),
+    ],
+    "restricted_domain": [
+        ("log(x)", (-10, -10, 10, 10)),
+        ("sqrt(4 - x**2)", (-10, -10, 10, 10)),
+    ],
+}
+
+
+class CountingCalculator(GraphCalculator):
+    def __init__(self):
+        super().__init__()
+        self.evaluations = 0
+
+    def _build_evaluator(self, formula: str, variables: Tuple[str, ...] = ("x",)):
+        evaluator = super()._build_evaluator(formula, variables)
+
+        def counted(*values: np.ndarray) -> np.ndarray:
+            result = evaluator(*values)
+            self.evaluations += int(np.size(result))
+            return result
+
+        return counted
+
+
+def stages(formula: str, world_coords: WorldCoords, size: int) -> Dict[str, Stage]:
+    x_min, y_min, x_max, y_max = world_coords
+    grid = np.linspace(x_min, x_max, size)
+
+    def analyzer(calculator: CountingCalculator) -> GraphAnalyzer:
+        instance = GraphAnalyzer(calculator, world_coords)
+        instance.samples = size
+        return instance
+
+    def plot(calculator: CountingCalculator, mode: str) -> Callable[[], None]:
+        # A new plotter every time: its tiles, artists and blit background
+        # would otherwise carry over from the previous stage or repeat.
+        plotter = GraphPlotter()
+        plotter.world_coords = world_coords
+        plotter.apply_viewport()
+        plotter.sampling_mode = mode
+        plotter.num_points = size
+
+        def draw() -> None:
+            plotter.plot_function(calculator, "f", formula, "#1f77b4")
+            plotter.redraw()
+
+        return draw
+
+    result: Dict[str, Stage] = {
+        "compile": lambda calculator: lambda: calculator.compile(formula),
+        "evaluate": lambda calculator: lambda: calculator.evaluate(formula, grid),
+        "calculate_scalar": lambda calculator: lambda: [calculator.calculate(formula, x) for x in grid[:1000]],
+        "plot_uniform": lambda calculator: plot(calculator, "uniform"),
+        "plot_adaptive": lambda calculator: plot(calculator, "adaptive"),
+        "analyze": lambda calculator: lambda: analyzer(calculator).analyze_function(formula),
+    }
+    for metric in METRICS:
+        result[f"metric:{metric}"] = (lambda calculator, metric=metric:
+                                      lambda: analyzer(calculator).analyze_function(formula, (metric,)))
+    return result
+
+
+def measure(stage: Stage, repeat: int) -> Dict[str, float]:
+    # Every repetition starts cold: fresh calculator caches and symbolic cache.
+    timings: List[float] = []
+    evaluations = 0
+    for _ in range(repeat):
+        clear_symbolic_cache()
+        calculator = CountingCalculator()
+        call = stage(calculator)
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+        evaluations = calculator.evaluations
+
+    clear_symbolic_cache()
+    call = stage(CountingCalculator())
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": min(timings), "evaluations": evaluations, "peak_bytes": peak}
+
+
+def run(sizes: List[int], repeat: int, selected: Optional[List[str]]) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    # One-time import and initialisation costs (sympy printers, lambdify)
+    # would otherwise be charged to whichever stage happens to run first.
+    GraphAnalyzer(GraphCalculator(), (-1, -1, 1, 1)).analyze_function("x**2")
+    for category, formulas in CORPUS.items():
+        for formula, world_coords in formulas:
+            for size in sizes:
+                for stage_name, stage in stages(formula, world_coords, size).items():
+                    if selected and not any(stage_name.startswith(prefix) for prefix in selected):
+                        continue
+                    key = f"{category} | {formula} | {size} | {stage_name}"
+                    results[key] = measure(stage, repeat)
+                    print(f"{key:<80} {results[key]['seconds'] * 1000:10.2f} ms "
+                          f"{results[key]['evaluations']:>10} evals {results[key]['peak_bytes'] / 1024:10.1f} KiB",
+                          flush=True)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    regressions: List[str] = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        # Very short stages are dominated by timer noise; ignore sub-millisecond deltas.
+        slower = current["seconds"] - previous["seconds"]
+        if slower > 1e-3 and current["seconds"] > previous["seconds"] * (1 + tolerance):
+            regressions.append(f"{key}: {previous['seconds'] * 1000:.2f} ms -> {current['seconds'] * 1000:.2f} ms")
+        if current["evaluations"] > previous["evaluations"] * (1 + tolerance):
+            regressions.append(f"{key}: {previous['evaluations']} -> {current['evaluations']} evaluations")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run_benchmarks",
+                                     description="Benchmarks for evaluation, plotting and analysis hot paths.")
+    parser.add_argument("--sizes", default="1000,10000", help="comma-separated grid sizes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stages", help="comma-separated stage name prefixes, e.g. evaluate,metric:roots")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against results saved earlier with --output")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown before failing")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    selected = args.stages.split(",") if args.stages else None
+    results = run(sizes, args.repeat, selected)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"python": platform.python_version(), "numpy": np.__version__, "results": results}, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,7 @@
 from turtle import *
-from math import *
+import numpy as np
+from modules.graph_calculator import GraphCalculator
+from modules.render_prep import prepare_polyline, split_runs
 
 # Set up the screen
 screensize(0.8, 0.8)
@@ -15,14 +17,22 @@ PRECISION = 0.01
 START = -500
 END = 500
 
+calculator = GraphCalculator()
+
 # Define a function to plot a graph
 def plot_graph(formula, color):
-    down()
+    # Only the visible part is drawn, with a few points per pixel column.
+    half_width, half_height = window_width() / 2 / SCALE, window_height() / 2 / SCALE
+    x = np.arange(START, END, PRECISION)
+    y = calculator.evaluate(formula, x)
+    x, y = prepare_polyline(x, y, (-half_width, -half_height, half_width, half_height), window_width())
     pencolor(color)
-    for x in range(START, END):
-        y = eval(formula)
-        goto(x * SCALE, y * SCALE)
-    up()
+    for run_x, run_y in split_runs(x, y):
+        goto(run_x[0] * SCALE, run_y[0] * SCALE)
+        down()
+        for point_x, point_y in zip(run_x[1:], run_y[1:]):
+            goto(point_x * SCALE, point_y * SCALE)
+        up()
 
 # Plot multiple graphs
 plot_graph("x**3 * sin(x**2)", "blue")
@@ -1,7 +1,22 @@
+import time
+STARTED = time.perf_counter()
+
+import sys
 import tkinter as tk
 from modules.gui import GraphCalculatorGUI
 
+
+def report_startup_time(app: GraphCalculatorGUI) -> None:
+    elapsed = time.perf_counter() - STARTED
+    loaded = [name for name in ("sympy", "scipy") if name in sys.modules]
+    print(f"Время запуска: {elapsed * 1000:.0f} мс (загружены: {', '.join(loaded) or 'без sympy/scipy'})")
+    app.on_close()
+
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = GraphCalculatorGUI(root)
-    root.mainloop()
\ No newline at end of file
+    if "--startup-time" in sys.argv[1:]:
+        # Reported once the window and the empty plot have been drawn.
+        root.after_idle(lambda: root.after(0, report_startup_time, app))
+    root.mainloop()
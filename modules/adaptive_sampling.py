@@ -0,0 +1,74 @@
+from typing import Callable, Tuple
+import numpy as np
+
+ArrayFunction = Callable[[np.ndarray], np.ndarray]
+
+
+def adaptive_sample(func: ArrayFunction, x_min: float, x_max: float, y_min: float, y_max: float,
+                    max_points: int, initial_points: int = 65, tolerance: float = 1e-3,
+                    min_width_ratio: float = 1e-7) -> Tuple[np.ndarray, np.ndarray, int]:
+    # Intervals are refined level by level: every pending interval gets its
+    # midpoint evaluated in one vectorized call, and only those where the
+    # midpoint deviates from the chord stay pending for the next level.
+    initial_points = max(2, min(initial_points, max_points))
+    x = np.linspace(x_min, x_max, initial_points)
+    y = func(x)
+    evaluations = initial_points
+
+    # Values are compared after clipping to a band around the viewport, so
+    # parts of the curve far off screen never count as curved.
+    y_span = y_max - y_min
+    y_low, y_high = y_min - y_span, y_max + y_span
+    abs_tolerance = tolerance * y_span
+    min_width = (x_max - x_min) * min_width_ratio
+    pending = np.ones(len(x) - 1, dtype=bool)
+    failing = np.zeros(len(x) - 1, dtype=bool)
+
+    while pending.any() and evaluations < max_points:
+        tested = np.flatnonzero(pending)
+        budget = max_points - evaluations
+        if len(tested) > budget:
+            jump = np.abs(y[tested + 1] - y[tested])
+            priority = np.where(np.isfinite(jump), jump, np.inf)
+            tested = np.sort(tested[np.argsort(-priority, kind="stable")[:budget]])
+
+        x_left, x_right = x[tested], x[tested + 1]
+        x_mid = (x_left + x_right) / 2
+        y_mid_raw = func(x_mid)
+        evaluations += len(tested)
+        y_left = np.clip(y[tested], y_low, y_high)
+        y_right = np.clip(y[tested + 1], y_low, y_high)
+        y_mid = np.clip(y_mid_raw, y_low, y_high)
+
+        finite_ends = np.isfinite(y_left) & np.isfinite(y_right)
+        with np.errstate(invalid="ignore"):
+            deviation = np.abs(y_mid - (y_left + y_right) / 2)
+        bad = np.where(finite_ends & np.isfinite(y_mid), deviation > abs_tolerance,
+                       np.isfinite(y_left) | np.isfinite(y_right) | np.isfinite(y_mid))
+        splittable = (x_right - x_left) / 2 > min_width
+
+        is_tested = np.zeros(len(pending), dtype=bool)
+        is_tested[tested] = True
+        bad_full = np.zeros(len(pending), dtype=bool)
+        bad_full[tested] = bad
+        splittable_full = np.zeros(len(pending), dtype=bool)
+        splittable_full[tested] = splittable
+        next_pending = np.where(is_tested, bad_full & splittable_full, pending)
+        next_failing = np.where(is_tested, bad_full, failing)
+        counts = 1 + is_tested.astype(int)
+
+        x = np.insert(x, tested + 1, x_mid)
+        y = np.insert(y, tested + 1, y_mid_raw)
+        pending = np.repeat(next_pending, counts)
+        failing = np.repeat(next_failing, counts)
+
+    # An interval that never settled into a straight line and jumps by more
+    # than the visible height is a pole or jump: break the line there
+    # instead of drawing a vertical spike.
+    with np.errstate(invalid="ignore"):
+        jumps = np.abs(np.diff(np.clip(y, y_low, y_high))) > y_span
+    breaks = np.flatnonzero(failing & jumps)
+    if len(breaks):
+        x = np.insert(x, breaks + 1, (x[breaks] + x[breaks + 1]) / 2)
+        y = np.insert(y, breaks + 1, np.nan)
+    return x, y, evaluations
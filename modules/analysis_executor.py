@@ -0,0 +1,186 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+import multiprocessing
+import os
+import queue
+import threading
+from modules.graph_calculator import GraphCalculator
+from modules.graph_analysis import GraphAnalyzer, AnalysisResult, METRICS, preload_analysis_modules
+from modules.instrumentation import profiler
+from modules.result_cache import AnalysisResultCache
+
+WorldCoords = Tuple[float, float, float, float]
+
+# Metrics that share the sampled grid stay together; the symbolic and
+# integration metrics are independent and can run on other workers.
+METRIC_GROUPS: Tuple[Tuple[str, ...], ...] = (
+    ("min", "max", "mean", "median", "std_dev", "roots", "discontinuities", "extrema"),
+    ("inflection_points",),
+    ("area_under_curve", "absolute_area", "area_error"),
+    ("derivative", "arc_length", "arc_length_error"),
+)
+
+
+def analyze_task(formula: str, world_coords: WorldCoords, metrics: Optional[Sequence[str]] = None,
+                 settings: Optional[Mapping[str, Any]] = None) -> Optional[AnalysisResult]:
+    analyzer = GraphAnalyzer(GraphCalculator(), world_coords)
+    for option, value in (settings or {}).items():
+        setattr(analyzer, option, value)
+    return analyzer.analyze_function(formula, metrics)
+
+
+def profiled_analyze_task(formula: str, world_coords: WorldCoords, metrics: Optional[Sequence[str]] = None,
+                          settings: Optional[Mapping[str, Any]] = None) -> Tuple[Optional[AnalysisResult], Dict[str, Dict[str, float]]]:
+    # Worker processes have their own registry; ship its records back so the
+    # GUI process can merge them into its own.
+    profiler.reset()
+    profiler.enabled = True
+    try:
+        return analyze_task(formula, world_coords, metrics, settings), profiler.snapshot()
+    finally:
+        profiler.enabled = False
+
+
+class AnalysisJob:
+    def __init__(self, tasks_per_function: Dict[str, int], profile: bool = False,
+                 on_result: Optional[Callable[[str, AnalysisResult], None]] = None):
+        self.profile: bool = profile
+        self.on_result: Optional[Callable[[str, AnalysisResult], None]] = on_result
+        self.names: List[str] = list(tasks_per_function)
+        self.total_tasks: int = sum(tasks_per_function.values())
+        self.completed_tasks: int = 0
+        self.cancelled: bool = False
+        self.results: "queue.Queue[Tuple[str, Optional[AnalysisResult]]]" = queue.Queue()
+        self.futures: List[Future] = []
+        self._partial: Dict[str, Dict[str, Any]] = {name: {} for name in self.names}
+        self._remaining: Dict[str, int] = dict(tasks_per_function)
+        self._failed: set = set()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.cancelled or self.completed_tasks >= self.total_tasks
+
+    def cancel(self) -> None:
+        # Taking the lock waits out a callback that is already storing a
+        # result; once this returns, on_result is never called again, so the
+        # caller may close what it writes to.
+        with self._lock:
+            self.cancelled = True
+        for future in self.futures:
+            future.cancel()
+
+    def _on_task_done(self, name: str, future: Future) -> None:
+        if future.cancelled() or self.cancelled:
+            return
+        try:
+            result = future.result()
+            if self.profile:
+                result, records = result
+                profiler.merge(records)
+        except Exception:
+            result = None
+        with self._lock:
+            if self.cancelled:
+                return
+            self.completed_tasks += 1
+            if result is None:
+                self._failed.add(name)
+            else:
+                self._partial[name].update(result)
+            self._remaining[name] -= 1
+            if self._remaining[name] == 0:
+                self._finish(name, self.on_result)
+
+    def add_known(self, name: str, result: Mapping[str, Any]) -> None:
+        with self._lock:
+            self._partial[name].update(result)
+            if self._remaining[name] == 0:
+                self._finish(name)
+
+    def _finish(self, name: str, on_result: Optional[Callable[[str, AnalysisResult], None]] = None) -> None:
+        partial = self._partial.pop(name)
+        ordered = {metric: partial[metric] for metric in METRICS if metric in partial}
+        if name in self._failed:
+            self.results.put((name, None))
+            return
+        if on_result is not None:
+            on_result(name, ordered)
+        self.results.put((name, ordered))
+
+
+class AnalysisExecutor:
+    def __init__(self, max_workers: Optional[int] = None, split_metrics: bool = True,
+                 result_cache: Optional[AnalysisResultCache] = None):
+        self.max_workers: int = max_workers or os.cpu_count() or 1
+        self.split_metrics: bool = split_metrics
+        self.result_cache: Optional[AnalysisResultCache] = result_cache
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._closed: bool = False
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("AnalysisExecutor is shut down")
+            if self._pool is None:
+                # Workers are spawned rather than forked so they never inherit
+                # the Tk interpreter or matplotlib state of the GUI process, and
+                # each one loads sympy and scipy as it starts.
+                self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"),
+                                                 initializer=preload_analysis_modules)
+            return self._pool
+
+    def warm_up(self) -> None:
+        # Workers are started on demand; one trivial task per worker starts
+        # them all, so the first analysis does not wait for their imports.
+        # Spawning blocks for a while, so callers run this off the Tk thread.
+        try:
+            for _ in range(self.max_workers):
+                self.pool.submit(int)
+        except RuntimeError:
+            # Shut down in the meantime.
+            pass
+
+    def submit(self, functions: Mapping[str, Mapping[str, Any]], world_coords: WorldCoords,
+               settings: Optional[Mapping[str, Any]] = None, profile: bool = False) -> AnalysisJob:
+        groups: List[Tuple[str, ...]] = list(METRIC_GROUPS) if self.split_metrics else [METRICS]
+        formulas = {name: function_data["formula"] for name, function_data in functions.items()}
+        known: Dict[str, Dict[str, Any]] = {}
+        planned: Dict[str, List[Tuple[str, ...]]] = {}
+        for name, formula in formulas.items():
+            planned[name] = groups
+            if self.result_cache is None:
+                continue
+            cached = self.result_cache.get(formula, world_coords, settings)
+            if cached is not None:
+                known[name], planned[name] = cached, []
+                continue
+            derivative = self.result_cache.get_derivative(formula)
+            if derivative is not None:
+                # Only the viewport changed: skip the symbolic differentiation.
+                known[name] = {"derivative": derivative}
+                trimmed = (tuple(metric for metric in group if metric != "derivative") for group in groups)
+                planned[name] = [group for group in trimmed if group]
+
+        on_result = None
+        if self.result_cache is not None:
+            on_result = lambda name, result: self.result_cache.put(formulas[name], world_coords, result, settings)
+        job = AnalysisJob({name: len(planned[name]) for name in formulas}, profile, on_result)
+        for name, result in known.items():
+            job.add_known(name, result)
+        task = profiled_analyze_task if profile else analyze_task
+        for name, function_groups in planned.items():
+            for metrics in function_groups:
+                future = self.pool.submit(task, formulas[name], world_coords, metrics, settings)
+                job.futures.append(future)
+                future.add_done_callback(lambda done, name=name: job._on_task_done(name, done))
+        return job
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._closed = True
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,187 @@
+import argparse
+import json
+import math
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, Mapping, Optional, Set, TextIO
+from modules.analysis_executor import AnalysisExecutor, analyze_task
+from modules.graph_calculator import GraphCalculator
+from modules.graph_analysis import INTEGRATION_MODES, METRICS
+from modules.result_cache import AnalysisResultCache
+
+
+def parse_line(line: str, line_number: int, defaults: Mapping[str, float]) -> Optional[Dict[str, Any]]:
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if line.startswith("{"):
+        item = json.loads(line)
+    else:
+        # Plain text: "formula" or "formula;x_min;x_max". Commas are not used
+        # as separators because formulas may contain them (log(x, 2)).
+        parts = [part.strip() for part in line.split(";")]
+        item = {"formula": parts[0]}
+        if len(parts) >= 3:
+            item["x_min"], item["x_max"] = float(parts[1]), float(parts[2])
+    item["formula"] = item["formula"].replace("^", "**")
+    item.setdefault("name", f"f{line_number}(x)")
+    for key, value in defaults.items():
+        item.setdefault(key, value)
+    return item
+
+
+def read_items(stream: TextIO, defaults: Mapping[str, float]) -> Iterator[Dict[str, Any]]:
+    for line_number, line in enumerate(stream, start=1):
+        try:
+            item = parse_line(line, line_number, defaults)
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            yield {"name": f"f{line_number}(x)", "line": line_number, "error": f"invalid input: {error}"}
+            continue
+        if item is not None:
+            yield item
+
+
+def json_safe(value: Any) -> Any:
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, (list, tuple)):
+        return [json_safe(item) for item in value]
+    if isinstance(value, dict):
+        return {key: json_safe(item) for key, item in value.items()}
+    return value
+
+
+def _world_coords(item: Mapping[str, Any]):
+    return (float(item["x_min"]), float(item.get("y_min", -10)), float(item["x_max"]), float(item.get("y_max", 10)))
+
+
+def _record(item: Mapping[str, Any], result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> Dict[str, Any]:
+    record = {key: item[key] for key in ("name", "formula", "x_min", "x_max") if key in item}
+    if error is not None:
+        record["error"] = error
+    elif result is None:
+        record["error"] = "function is undefined on the whole range"
+    else:
+        record["result"] = json_safe(result)
+    return record
+
+
+def analyze_formulas(items: Iterable[Mapping[str, Any]], workers: int = 0, metrics: Optional[Iterable[str]] = None,
+                     settings: Optional[Mapping[str, Any]] = None, max_pending: int = 256,
+                     cache: Optional[AnalysisResultCache] = None) -> Iterator[Dict[str, Any]]:
+    metrics = tuple(metrics) if metrics is not None else None
+    items = _validated(items)
+
+    def cached(item: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+        if cache is None:
+            return None
+        return cache.get(item["formula"], _world_coords(item), settings, metrics)
+
+    def store(item: Mapping[str, Any], result: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if cache is not None and result is not None:
+            cache.put(item["formula"], _world_coords(item), result, settings, metrics)
+        return result
+
+    if workers == 1:
+        for item in items:
+            if "error" in item:
+                yield dict(item)
+                continue
+            hit = cached(item)
+            if hit is not None:
+                yield _record(item, hit)
+                continue
+            try:
+                yield _record(item, store(item, analyze_task(item["formula"], _world_coords(item), metrics, settings)))
+            except Exception as error:
+                yield _record(item, error=str(error))
+        return
+
+    executor = AnalysisExecutor(workers or None, split_metrics=False)
+    pending: Dict[Future, Mapping[str, Any]] = {}
+    try:
+        for item in items:
+            if "error" in item:
+                yield dict(item)
+                continue
+            hit = cached(item)
+            if hit is not None:
+                yield _record(item, hit)
+                continue
+            # Only a bounded window is in flight, so input is streamed rather
+            # than read into memory before the first result comes out.
+            if len(pending) >= max_pending:
+                yield from _drain(pending, FIRST_COMPLETED, store)
+            future = executor.pool.submit(analyze_task, item["formula"], _world_coords(item), metrics, settings)
+            pending[future] = item
+        while pending:
+            yield from _drain(pending, FIRST_COMPLETED, store)
+    finally:
+        executor.shutdown()
+
+
+def _validated(items: Iterable[Mapping[str, Any]]) -> Iterator[Mapping[str, Any]]:
+    calculator = GraphCalculator()
+    for item in items:
+        if "error" not in item:
+            try:
+                calculator.compile(item["formula"])
+            except ValueError as error:
+                item = _record(item, error=str(error))
+        yield item
+
+
+def _drain(pending: Dict[Future, Mapping[str, Any]], return_when: str,
+           store: Callable[[Mapping[str, Any], Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    done: Set[Future] = wait(pending, return_when=return_when).done
+    for future in done:
+        item = pending.pop(future)
+        try:
+            yield _record(item, store(item, future.result()))
+        except Exception as error:
+            yield _record(item, error=str(error))
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m modules.batch",
+                                     description="Headless batch analysis of formulas; writes JSON Lines to stdout.")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="file with one formula per line (plain 'formula;x_min;x_max' or JSON objects), '-' for stdin")
+    parser.add_argument("--x-min", type=float, default=-10.0)
+    parser.add_argument("--x-max", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (0 = CPU count, 1 = run inline)")
+    parser.add_argument("--samples", type=int, default=10000)
+    parser.add_argument("--integration-mode", choices=INTEGRATION_MODES, default="grid")
+    parser.add_argument("--streaming", action="store_true",
+                        help="analyse in fixed-size chunks so memory does not grow with --samples")
+    parser.add_argument("--chunk-size", type=int, default=262_144)
+    parser.add_argument("--metrics", help=f"comma-separated subset of: {', '.join(METRICS)}")
+    parser.add_argument("--cache", metavar="PATH", help="reuse and store results in this SQLite cache file")
+    args = parser.parse_args(argv)
+
+    metrics = None
+    if args.metrics:
+        metrics = [metric.strip() for metric in args.metrics.split(",") if metric.strip()]
+        unknown = sorted(set(metrics) - set(METRICS))
+        if unknown:
+            parser.error(f"unknown metrics: {', '.join(unknown)}")
+
+    settings = {"samples": args.samples, "integration_mode": args.integration_mode,
+                "streaming": args.streaming, "chunk_size": args.chunk_size}
+    defaults = {"x_min": args.x_min, "x_max": args.x_max}
+    cache = AnalysisResultCache(args.cache) if args.cache else None
+    stream = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    try:
+        for record in analyze_formulas(read_items(stream, defaults), args.workers, metrics, settings, cache=cache):
+            sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if cache is not None:
+            cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
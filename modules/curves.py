@@ -0,0 +1,116 @@
+from typing import Callable, Optional, Tuple
+import numpy as np
+from modules.interval import IntervalFunction
+
+GridFunction = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+EXPLICIT = "explicit"
+IMPLICIT = "implicit"
+PARAMETRIC = "parametric"
+
+
+def _crossings(x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray,
+               v0: np.ndarray, v1: np.ndarray) -> np.ndarray:
+    # Linear interpolation of the zero on every edge at once; NaN where the
+    # edge has no sign change.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = v0 / (v0 - v1)
+    crosses = (v0 < 0) != (v1 < 0)
+    t = np.where(crosses, t, np.nan)
+    return np.stack((x0 + t * (x1 - x0), y0 + t * (y1 - y0)), axis=-1)
+
+
+def marching_squares(x0: np.ndarray, y0: np.ndarray, width: float, height: float,
+                     corners: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # corners: (cells, 4) values at (x0, y0), (x1, y0), (x1, y1), (x0, y1).
+    # Returns (segments, 2, 2) line segments, ready for a LineCollection,
+    # and the index of the cell each segment came from.
+    x1, y1 = x0 + width, y0 + height
+    v0, v1, v2, v3 = corners.T
+    edges = np.stack((
+        _crossings(x0, y0, x1, y0, v0, v1),  # bottom
+        _crossings(x1, y0, x1, y1, v1, v2),  # right
+        _crossings(x0, y1, x1, y1, v3, v2),  # top
+        _crossings(x0, y0, x0, y1, v0, v3),  # left
+    ), axis=1)
+    crossed = ~np.isnan(edges[:, :, 0])
+    count = crossed.sum(axis=1)
+
+    simple = count == 2
+    order = np.argsort(~crossed[simple], axis=1, kind="stable")[:, :2]
+    rows = np.flatnonzero(simple)
+    segments = [np.stack((edges[rows, order[:, 0]], edges[rows, order[:, 1]]), axis=1)]
+    owners = [rows]
+
+    # Saddle cells: the sign of the centre decides which corners connect.
+    saddle = np.flatnonzero(count == 4)
+    if len(saddle):
+        center = corners[saddle].mean(axis=1)
+        joins_v0 = (center < 0) == (v0[saddle] < 0)
+        first = np.where(joins_v0[:, None], [0, 1], [0, 3])
+        second = np.where(joins_v0[:, None], [2, 3], [1, 2])
+        for pair in (first, second):
+            segments.append(np.stack((edges[saddle, pair[:, 0]], edges[saddle, pair[:, 1]]), axis=1))
+            owners.append(saddle)
+    return np.concatenate(segments), np.concatenate(owners)
+
+
+def implicit_segments(func: GridFunction, x_min: float, x_max: float, y_min: float, y_max: float,
+                      cells: Tuple[int, int] = (128, 128), levels: int = 3,
+                      bounds: Optional[IntervalFunction] = None) -> np.ndarray:
+    columns, rows = cells
+    x_edges = np.linspace(x_min, x_max, columns + 1)
+    y_edges = np.linspace(y_min, y_max, rows + 1)
+    # One vectorised call over the whole coarse grid.
+    grid = func(x_edges[None, :], y_edges[:, None])
+    corners = np.stack((grid[:-1, :-1], grid[:-1, 1:], grid[1:, 1:], grid[1:, :-1]), axis=-1).reshape(-1, 4)
+    x0 = np.broadcast_to(x_edges[None, :-1], (rows, columns)).ravel()
+    y0 = np.broadcast_to(y_edges[:-1, None], (rows, columns)).ravel()
+    width, height = (x_max - x_min) / columns, (y_max - y_min) / rows
+
+    for _ in range(levels):
+        keep = _straddles(corners)
+        x0, y0, corners = x0[keep], y0[keep], corners[keep]
+        # Quadtree step: only cells the curve passes through are split, and
+        # the five new points of every split cell go through one evaluation.
+        width, height = width / 2, height / 2
+        xm, ym, x1, y1 = x0 + width, y0 + height, x0 + 2 * width, y0 + 2 * height
+        points_x = np.concatenate((xm, x1, xm, x0, xm))
+        points_y = np.concatenate((y0, ym, y1, ym, ym))
+        bottom, right, top, left, center = func(points_x, points_y).reshape(5, -1)
+        v0, v1, v2, v3 = corners.T
+        corners = np.concatenate((
+            np.stack((v0, bottom, center, left), axis=1),
+            np.stack((bottom, v1, right, center), axis=1),
+            np.stack((center, right, v2, top), axis=1),
+            np.stack((left, center, top, v3), axis=1),
+        ))
+        x0 = np.concatenate((x0, xm, xm, x0))
+        y0 = np.concatenate((y0, y0, ym, ym))
+
+    keep = _straddles(corners)
+    x0, y0, corners = x0[keep], y0[keep], corners[keep]
+    segments, owners = marching_squares(x0, y0, width, height, corners)
+    if len(segments) == 0:
+        return segments
+    # A sign change across a pole (F = y - tan(x)) is not a zero. Where the
+    # pole is steep enough, |F| at the segment midpoint is above every corner.
+    middle = segments.mean(axis=1)
+    with np.errstate(invalid="ignore"):
+        genuine = np.abs(func(middle[:, 0], middle[:, 1])) <= np.abs(corners[owners]).max(axis=1)
+    if bounds is not None:
+        # Near the asymptote the midpoint test lets most segments through, so
+        # cells whose enclosure may contain a pole are dropped. Constructs
+        # interval evaluation does not model are flagged even at a single
+        # point; those flags carry no information and are ignored.
+        pole = bounds(x0, x0 + width, y0, y0 + height).pole & ~bounds(x0, x0, y0, y0).pole
+        genuine &= ~pole[owners]
+    return segments[genuine]
+
+
+def _straddles(corners: np.ndarray) -> np.ndarray:
+    # Cells with a corner outside the domain are dropped; the curve cannot be
+    # placed reliably there.
+    negative = (corners < 0).any(axis=1)
+    positive = (corners >= 0).any(axis=1)
+    return negative & positive & np.isfinite(corners).all(axis=1)
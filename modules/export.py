@@ -0,0 +1,126 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+import numpy as np
+from numpy.lib import format as npy_format
+from modules.batch import json_safe
+from modules.graph_calculator import GraphCalculator
+
+SAMPLE_FORMATS = (".npy", ".npz", ".csv")
+
+
+def sample_chunks(x_min: float, x_max: float, num: int, chunk_size: int) -> Iterator[Tuple[int, int, np.ndarray]]:
+    # The same grid as np.linspace(x_min, x_max, num), produced piece by piece.
+    step = (x_max - x_min) / (num - 1) if num > 1 else 0.0
+    for start in range(0, num, chunk_size):
+        stop = min(start + chunk_size, num)
+        yield start, stop, x_min + step * np.arange(start, stop, dtype=float)
+
+
+def export_samples(calculator: GraphCalculator, path: str, x_min: float, x_max: float, num: int,
+                   functions: Optional[Mapping[str, Mapping[str, Any]]] = None, chunk_size: int = 262_144) -> None:
+    # Explicit functions only; parameterised ones are written at their current values.
+    functions = calculator.explicit_functions() if functions is None else functions
+    if num < 1:
+        raise ValueError("Число точек должно быть положительным")
+    if "x" in functions:
+        raise ValueError("Имя функции 'x' занято столбцом аргумента")
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SAMPLE_FORMATS:
+        raise ValueError(f"Неподдерживаемый формат экспорта '{extension}': ожидается {', '.join(SAMPLE_FORMATS)}")
+    formulas = {name: function_data["formula"] for name, function_data in functions.items()}
+    writer = {".npy": _write_npy, ".npz": _write_npz, ".csv": _write_csv}[extension]
+    writer(calculator, path, formulas, x_min, x_max, num, chunk_size)
+
+
+def _write_npy(calculator: GraphCalculator, path: str, formulas: Mapping[str, str], x_min: float, x_max: float,
+               num: int, chunk_size: int) -> None:
+    # One structured array with an "x" field and a field per function, written
+    # through a memory map: np.load(path, mmap_mode="r") reads it back lazily.
+    dtype = np.dtype([("x", np.float64)] + [(name, np.float64) for name in formulas])
+    table = npy_format.open_memmap(path, mode="w+", dtype=dtype, shape=(num,))
+    try:
+        for start, stop, x_values in sample_chunks(x_min, x_max, num, chunk_size):
+            table["x"][start:stop] = x_values
+            for name, formula in formulas.items():
+                table[name][start:stop] = calculator.evaluate(formula, x_values)
+        table.flush()
+    finally:
+        del table
+
+
+def _write_npz(calculator: GraphCalculator, path: str, formulas: Mapping[str, str], x_min: float, x_max: float,
+               num: int, chunk_size: int) -> None:
+    # np.savez needs every array in memory; members are streamed into the
+    # archive instead, each one a plain .npy that np.load understands.
+    header = {"descr": npy_format.dtype_to_descr(np.dtype(np.float64)), "fortran_order": False, "shape": (num,)}
+    columns: Dict[str, Optional[str]] = {"x": None, **formulas}
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for name, formula in columns.items():
+            with archive.open(f"{name}.npy", "w", force_zip64=True) as member:
+                npy_format.write_array_header_2_0(member, header)
+                for _, _, x_values in sample_chunks(x_min, x_max, num, chunk_size):
+                    values = x_values if formula is None else calculator.evaluate(formula, x_values)
+                    member.write(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+
+
+def _write_csv(calculator: GraphCalculator, path: str, formulas: Mapping[str, str], x_min: float, x_max: float,
+               num: int, chunk_size: int) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        csv.writer(file).writerow(["x", *formulas])
+        for _, _, x_values in sample_chunks(x_min, x_max, num, chunk_size):
+            columns = [x_values] + [calculator.evaluate(formula, x_values) for formula in formulas.values()]
+            # %.17g round-trips every float64 exactly.
+            np.savetxt(file, np.column_stack(columns), fmt="%.17g", delimiter=",")
+
+
+def export_analysis(results: Mapping[str, Mapping[str, Any]], path: str,
+                    functions: Optional[Mapping[str, Mapping[str, Any]]] = None,
+                    world_coords: Optional[Tuple[float, float, float, float]] = None) -> None:
+    # Records have the same shape as the JSON Lines written by modules.batch.
+    records: List[Dict[str, Any]] = []
+    for name, result in results.items():
+        record: Dict[str, Any] = {"name": name}
+        if functions is not None and name in functions:
+            record["formula"] = functions[name]["formula"]
+        if world_coords is not None:
+            record["x_min"], record["x_max"] = world_coords[0], world_coords[2]
+        record["result"] = json_safe(dict(result))
+        records.append(record)
+    document = {"world_coords": list(world_coords) if world_coords is not None else None, "results": records}
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(document, file, ensure_ascii=False, indent=2)
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m modules.export",
+                                     description="Write sampled (x, y) data of formulas to .npy, .npz or .csv.")
+    parser.add_argument("formulas", nargs="+", help="formulas in x, e.g. 'sin(x)' 'x^2 - 4'")
+    parser.add_argument("--output", "-o", required=True, help=f"output file ({', '.join(SAMPLE_FORMATS)})")
+    parser.add_argument("--x-min", type=float, default=-10.0)
+    parser.add_argument("--x-max", type=float, default=10.0)
+    parser.add_argument("--samples", type=int, default=10000)
+    parser.add_argument("--chunk-size", type=int, default=262_144)
+    args = parser.parse_args(argv)
+
+    calculator = GraphCalculator()
+    for number, formula in enumerate(args.formulas, start=1):
+        formula = formula.replace("^", "**")
+        try:
+            calculator.compile(formula)
+        except ValueError as error:
+            parser.error(str(error))
+        calculator.add_function(f"f{number}(x)", formula, "#000000")
+    try:
+        export_samples(calculator, args.output, args.x_min, args.x_max, args.samples, chunk_size=args.chunk_size)
+    except ValueError as error:
+        parser.error(str(error))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,7 +7,7 @@ class FunctionInputDialog:
         self.result = None
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("Ввод функции")
-        self.dialog.geometry("400x300")
+        self.dialog.geometry("400x360")
         self.dialog.transient(parent)
         self.dialog.grab_set()
 
@@ -16,6 +16,7 @@ class FunctionInputDialog:
     def create_widgets(self):
         self.function_entry = ttk.Entry(self.dialog, width=40)
         self.function_entry.pack(pady=10)
+        ttk.Label(self.dialog, text="Примеры: x^2, x^2 + y^2 = 4, cos(t); sin(t); 0; 2*pi").pack()
 
         button_frame = ttk.Frame(self.dialog)
         button_frame.pack(fill=tk.BOTH, expand=True)
@@ -25,7 +26,8 @@ class FunctionInputDialog:
             '4', '5', '6', '*', '(',
             '1', '2', '3', '-', ')',
             '0', '.', '^', '+', 'x',
-            'sin', 'cos', 'tan', 'log', 'exp'
+            'sin', 'cos', 'tan', 'log', 'exp',
+            'y', 't', '=', ';', 'sqrt'
         ]
 
         row, col = 0, 0
@@ -1,141 +1,218 @@
 import numpy as np
-from scipy import integrate
-from typing import Dict, List, Tuple, Any, Optional, Union
-from sympy import sympify, diff, Symbol, SympifyError
-import warnings
+from typing import Callable, Dict, Iterable, List, Tuple, Any, Optional, Union
+from modules.root_finding import sign_change_brackets, solve_brackets, merge_roots, reject_poles
+from modules.interval import IntervalFunction, locate_poles
+from modules.symbolic import get_symbolic
+from modules.instrumentation import profiler
+from modules.quadrature import simpson_grid, gauss_legendre, adaptive_quad
+from modules.streaming_analysis import StreamingAnalyzer
+
+AnalysisResult = Dict[str, Union[float, str, List[Union[float, Tuple[float, float]]], None]]
+
+METRICS: Tuple[str, ...] = (
+    "min", "max", "mean", "median", "std_dev", "roots", "discontinuities", "extrema",
+    "inflection_points", "area_under_curve", "absolute_area", "area_error",
+    "derivative", "arc_length", "arc_length_error",
+)
+
+INTEGRATION_MODES: Tuple[str, ...] = ("grid", "gauss", "quad")
 
 class GraphAnalyzer:
     def __init__(self, calculator: 'GraphCalculator', world_coords: Tuple[float, float, float, float]):
         self.calculator: 'GraphCalculator' = calculator
         self.world_coords: Tuple[float, float, float, float] = world_coords
+        self.samples: int = 10000
+        self.integration_mode: str = "grid"
+        self.streaming: bool = False
+        self.chunk_size: int = 262_144
+        self.max_in_memory_samples: int = 2_000_000
+
+    def analyze(self) -> Dict[str, AnalysisResult]:
+        results: Dict[str, AnalysisResult] = {}
+        x_min, _, x_max, _ = self.world_coords
+        y_rows: Optional[np.ndarray] = None
+        if not self.uses_streaming():
+            # All functions share one grid and one evaluation block.
+            _, x_range, y_rows = self.calculator.evaluate_all(x_min, x_max, self.samples)
+        for row, (name, function_data) in enumerate(self.calculator.explicit_functions().items()):
+            samples = None if y_rows is None else (x_range, y_rows[row])
+            result: Optional[AnalysisResult] = self.analyze_function(function_data["formula"], samples=samples)
+            if result is not None:
+                results[name] = result
+        return results
+
+    def uses_streaming(self) -> bool:
+        return self.streaming or self.samples > self.max_in_memory_samples
 
-    def analyze(self) -> Dict[str, Dict[str, Union[float, str, List[Union[float, Tuple[float, float]]], None]]]:
-        results: Dict[str, Dict[str, Union[float, str, List[Union[float, Tuple[float, float]]], None]]] = {}
+    def analyze_function(self, formula: str, metrics: Optional[Iterable[str]] = None,
+                         samples: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Optional[AnalysisResult]:
         x_min, y_min, x_max, y_max = self.world_coords
-        x_range: np.ndarray = np.linspace(x_min, x_max, 10000)
+        if self.uses_streaming():
+            return StreamingAnalyzer(self).analyze_function(formula, metrics)
 
-        for name, function_data in self.calculator.functions.items():
-            formula: str = function_data["formula"]
+        if samples is None:
+            x_range: np.ndarray = np.linspace(x_min, x_max, self.samples)
+            # y_values stays aligned with x_range; points outside the domain are NaN.
             y_values: np.ndarray = self.safe_calculate(formula, x_range)
+        else:
+            x_range, y_values = samples
+            y_values = np.where(np.isfinite(y_values), y_values, np.nan)
+        if not np.isfinite(y_values).any():
+            return None
 
-            if len(y_values) > 0:
-                results[name] = {
-                    "min": float(np.nanmin(y_values)),
-                    "max": float(np.nanmax(y_values)),
-                    "mean": float(np.nanmean(y_values)),
-                    "median": float(np.nanmedian(y_values)),
-                    "std_dev": float(np.nanstd(y_values)),
-                    "roots": self.find_roots(formula, x_range, y_values),
-                    "extrema": self.find_extrema(x_range, y_values),
-                    "inflection_points": self.find_inflection_points(formula, x_range),
-                    "area_under_curve": self.calculate_area(formula, x_min, x_max),
-                    "derivative": self.get_derivative(formula),
-                    "arc_length": self.calculate_arc_length(formula, x_min, x_max),
-                }
-
-        return results
+        selected = set(METRICS if metrics is None else metrics)
+        integrals: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+
+        def integral(key: str, compute: Callable[[], Tuple[Optional[float], Optional[float]]]) -> Tuple[Optional[float], Optional[float]]:
+            if key not in integrals:
+                integrals[key] = compute()
+            return integrals[key]
+
+        area = lambda: integral("area", lambda: self.area_with_error(formula, x_min, x_max, False, x_range, y_values))
+        absolute_area = lambda: integral("absolute_area", lambda: self.area_with_error(formula, x_min, x_max, True, x_range, y_values))
+        arc_length = lambda: integral("arc_length", lambda: self.arc_length_with_error(formula, x_min, x_max, x_range))
+        calculations: Dict[str, Callable[[], Any]] = {
+            "min": lambda: float(np.nanmin(y_values)),
+            "max": lambda: float(np.nanmax(y_values)),
+            "mean": lambda: float(np.nanmean(y_values)),
+            "median": lambda: float(np.nanmedian(y_values)),
+            "std_dev": lambda: float(np.nanstd(y_values)),
+            "roots": lambda: self.find_roots(formula, x_range, y_values),
+            "discontinuities": lambda: self.find_discontinuities(formula, x_min, x_max),
+            "extrema": lambda: self.find_extrema(x_range, y_values),
+            "inflection_points": lambda: self.find_inflection_points(formula, x_range),
+            "area_under_curve": lambda: area()[0],
+            "absolute_area": lambda: absolute_area()[0],
+            "area_error": lambda: area()[1],
+            "derivative": lambda: self.get_derivative(formula),
+            "arc_length": lambda: arc_length()[0],
+            "arc_length_error": lambda: arc_length()[1],
+        }
+        return {metric: profiler.call(f"GraphAnalyzer.{metric}", calculate)
+                for metric, calculate in calculations.items() if metric in selected}
 
     def safe_calculate(self, formula: str, x_values: np.ndarray) -> np.ndarray:
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            y_values: np.ndarray = np.array([self.calculator.calculate(formula, x) for x in x_values])
-        return y_values[np.isfinite(y_values)]
+        y_values: np.ndarray = self.calculator.evaluate(formula, x_values)
+        return np.where(np.isfinite(y_values), y_values, np.nan)
 
     def find_roots(self, formula: str, x_range: np.ndarray, y_values: np.ndarray) -> Optional[List[float]]:
         try:
-            roots: List[float] = []
-            for i in range(len(y_values) - 1):
-                if y_values[i] * y_values[i+1] <= 0:
-                    root = self.binary_search_root(formula, x_range[i], x_range[i+1], y_values[i], y_values[i+1])
-                    if root is not None:
-                        roots.append(round(root, 4))
-            return roots if roots else None
+            roots: np.ndarray = self.roots_on_grid(self.calculator.compile(formula), x_range, y_values,
+                                                   bounds=self.calculator.compile_interval(formula))
+            return np.round(roots, 4).tolist() if len(roots) else None
+        except Exception:
+            return None
+
+    def find_discontinuities(self, formula: str, x_min: float, x_max: float) -> Optional[List[float]]:
+        try:
+            poles: np.ndarray = locate_poles(self.calculator.compile_interval(formula), self.calculator.compile(formula),
+                                             x_min, x_max)
+            return np.round(poles, 4).tolist() if len(poles) else None
         except Exception:
             return None
 
+    def roots_on_grid(self, func: Callable[[np.ndarray], np.ndarray], x_range: np.ndarray, y_values: np.ndarray,
+                      include_zero_runs: bool = True, tolerance: float = 1e-6,
+                      bounds: Optional[IntervalFunction] = None) -> np.ndarray:
+        brackets, zeros = sign_change_brackets(y_values, include_zero_runs)
+        refined: np.ndarray = self.refine_brackets(func, x_range[brackets], x_range[brackets + 1],
+                                                   y_values[brackets], y_values[brackets + 1], tolerance, bounds)
+        return merge_roots(np.concatenate((refined, x_range[zeros])), tolerance)
+
+    def refine_brackets(self, func: Callable[[np.ndarray], np.ndarray], x1: np.ndarray, x2: np.ndarray,
+                        y1: np.ndarray, y2: np.ndarray, tolerance: float = 1e-6,
+                        bounds: Optional[IntervalFunction] = None) -> np.ndarray:
+        if bounds is None:
+            roots, _ = solve_brackets(func, x1, x2, y1, y2, tolerance)
+            return reject_poles(func, roots, y1, y2)
+        # Brackets whose enclosure excludes zero cannot hold a root, and only
+        # brackets that may hold a pole need the pole check.
+        enclosure = bounds(x1, x2)
+        searchable = enclosure.contains_zero()
+        roots = np.full(len(x1), np.nan)
+        roots[searchable], _ = solve_brackets(func, x1[searchable], x2[searchable], y1[searchable], y2[searchable], tolerance)
+        return reject_poles(func, roots, y1, y2, enclosure.pole)
+
     def binary_search_root(self, formula: str, x1: float, x2: float, y1: float, y2: float, tolerance: float = 1e-6) -> Optional[float]:
         try:
-            while abs(x2 - x1) > tolerance:
-                x_mid: float = (x1 + x2) / 2
-                y_mid: float = self.calculator.calculate(formula, x_mid)
-                if y_mid is None or not np.isfinite(y_mid):
-                    return None
-                if y_mid * y1 <= 0:
-                    x2, y2 = x_mid, y_mid
-                else:
-                    x1, y1 = x_mid, y_mid
-            return (x1 + x2) / 2
+            root: float = float(self.refine_brackets(self.calculator.compile(formula), np.array([x1]), np.array([x2]),
+                                                     np.array([y1]), np.array([y2]), tolerance,
+                                                     self.calculator.compile_interval(formula))[0])
+            return root if np.isfinite(root) else None
         except Exception:
             return None
 
     def find_extrema(self, x_range: np.ndarray, y_values: np.ndarray) -> Optional[List[Tuple[float, float]]]:
         try:
-            extrema: List[Tuple[float, float]] = []
-            for i in range(1, len(y_values) - 1):
-                if (y_values[i-1] < y_values[i] > y_values[i+1]) or (y_values[i-1] > y_values[i] < y_values[i+1]):
-                    extrema.append((round(float(x_range[i]), 4), round(float(y_values[i]), 4)))
+            left, middle, right = y_values[:-2], y_values[1:-1], y_values[2:]
+            indices: np.ndarray = np.flatnonzero(((left < middle) & (middle > right)) | ((left > middle) & (middle < right))) + 1
+            extrema: List[Tuple[float, float]] = list(zip(np.round(x_range[indices], 4).tolist(),
+                                                          np.round(y_values[indices], 4).tolist()))
             return extrema if extrema else None
         except Exception:
             return None
 
     def find_inflection_points(self, formula: str, x_range: np.ndarray) -> Optional[List[Tuple[float, float]]]:
         try:
-            x: Symbol = Symbol('x')
-            expr = sympify(formula)
-            second_derivative = diff(expr, x, 2)
-            inflection_points: List[Tuple[float, float]] = []
-
-            for i in range(len(x_range) - 1):
-                y1 = self.safe_sympy_eval(second_derivative, x_range[i])
-                y2 = self.safe_sympy_eval(second_derivative, x_range[i+1])
-                if y1 is not None and y2 is not None and y1 * y2 <= 0:
-                    x_inflection = self.binary_search_root(str(second_derivative), x_range[i], x_range[i+1], y1, y2)
-                    if x_inflection is not None:
-                        y_inflection = self.calculator.calculate(formula, x_inflection)
-                        if y_inflection is not None and np.isfinite(y_inflection):
-                            inflection_points.append((round(x_inflection, 4), round(y_inflection, 4)))
+            second_derivative = get_symbolic(formula).second_derivative_function
+            values: np.ndarray = second_derivative(x_range)
+            x_inflection: np.ndarray = self.roots_on_grid(second_derivative, x_range, values, include_zero_runs=False)
+            y_inflection: np.ndarray = self.calculator.evaluate(formula, x_inflection)
+            finite: np.ndarray = np.isfinite(y_inflection)
+            inflection_points: List[Tuple[float, float]] = list(zip(np.round(x_inflection[finite], 4).tolist(),
+                                                                    np.round(y_inflection[finite], 4).tolist()))
             return inflection_points if inflection_points else None
-        except (SympifyError, Exception):
+        except Exception:
             return None
 
-    def safe_sympy_eval(self, expr: Symbol, value: float) -> Optional[float]:
+    def integrate(self, func: Callable[[np.ndarray], np.ndarray], x_min: float, x_max: float,
+                  x_range: Optional[np.ndarray] = None, values: Optional[np.ndarray] = None) -> Tuple[Optional[float], Optional[float]]:
+        if self.integration_mode == "quad":
+            value, error = adaptive_quad(func, x_min, x_max)
+        elif self.integration_mode == "gauss":
+            value, error = gauss_legendre(func, x_min, x_max)
+        else:
+            if x_range is None:
+                x_range = np.linspace(x_min, x_max, self.samples)
+            value, error = simpson_grid(x_range, func(x_range) if values is None else values)
+        if not np.isfinite(value):
+            return None, None
+        return round(value, 4), float(f"{error:.3g}")
+
+    def area_with_error(self, formula: str, x_min: float, x_max: float, absolute: bool = False,
+                        x_range: Optional[np.ndarray] = None, y_grid: Optional[np.ndarray] = None) -> Tuple[Optional[float], Optional[float]]:
         try:
-            result: float = float(expr.subs('x', value))
-            return result if np.isfinite(result) else None
+            function = self.calculator.compile(formula)
+            func = (lambda x: np.abs(function(x))) if absolute else function
+            values = None if y_grid is None else (np.abs(y_grid) if absolute else y_grid)
+            return self.integrate(func, x_min, x_max, x_range, values)
         except Exception:
-            return None
+            return None, None
 
-    def calculate_area(self, formula: str, x_min: float, x_max: float) -> Optional[float]:
+    def calculate_area(self, formula: str, x_min: float, x_max: float, absolute: bool = False) -> Optional[float]:
+        return self.area_with_error(formula, x_min, x_max, absolute)[0]
+
+    def get_derivative(self, formula: str) -> Optional[str]:
         try:
-            def func(x: float) -> float:
-                result = self.calculator.calculate(formula, x)
-                return result if result is not None and np.isfinite(result) else 0
-            
-            area, _ = integrate.quad(func, x_min, x_max)
-            return round(area, 4) if np.isfinite(area) else None
+            return str(get_symbolic(formula).first_derivative)
         except Exception:
             return None
 
-    def get_derivative(self, formula: str) -> Optional[str]:
+    def arc_length_with_error(self, formula: str, x_min: float, x_max: float,
+                              x_range: Optional[np.ndarray] = None) -> Tuple[Optional[float], Optional[float]]:
         try:
-            x: Symbol = Symbol('x')
-            expr = sympify(formula)
-            derivative = diff(expr, x)
-            return str(derivative)
-        except (SympifyError, Exception):
-            return None
+            derivative = get_symbolic(formula).first_derivative_function
+            return self.integrate(lambda x: np.sqrt(1 + derivative(x) ** 2), x_min, x_max, x_range)
+        except Exception:
+            return None, None
 
     def calculate_arc_length(self, formula: str, x_min: float, x_max: float) -> Optional[float]:
-        try:
-            x: Symbol = Symbol('x')
-            expr = sympify(formula)
-            derivative = diff(expr, x)
+        return self.arc_length_with_error(formula, x_min, x_max)[0]
 
-            def integrand(x: float) -> float:
-                dy_dx = self.safe_sympy_eval(derivative, x)
-                return np.sqrt(1 + dy_dx**2) if dy_dx is not None else 0
 
-            arc_length, _ = integrate.quad(integrand, x_min, x_max)
-            return round(arc_length, 4) if np.isfinite(arc_length) else None
-        except Exception:
-            return None
+def preload_analysis_modules() -> None:
+    # sympy and scipy are imported on first use; AnalysisExecutor runs this
+    # as its worker initializer, so the cost is paid when the workers start
+    # rather than on the first "Анализировать" click.
+    get_symbolic("sin(x)*x").second_derivative_function
+    simpson_grid(np.linspace(0, 1, 5), np.zeros(5))
@@ -1,8 +1,45 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Mapping, Optional, Callable, Tuple
+from types import CodeType
+import ast
 import math
+import re
+import time
+import numpy as np
+from modules.cache import LRUCache
+from modules.tiles import TileCache
+from modules.interval import IntervalCompiler, IntervalFunction
+from modules.curves import EXPLICIT, IMPLICIT, PARAMETRIC, implicit_segments
+from modules.instrumentation import profiler
+
+ArrayFunction = Callable[[np.ndarray], np.ndarray]
+
+
+def _array_log(x: np.ndarray, base: Optional[float] = None) -> np.ndarray:
+    if base is None:
+        return np.log(x)
+    return np.log(x) / np.log(base)
+
+
+def _cache_key(value: float) -> float:
+    # Zooming in and back out (0.8 * 1.25) or panning back and forth leaves
+    # rounding noise in the last bits; it must not defeat the cache.
+    return float(f"{value:.12g}")
+
+
+class _BindParameters(ast.NodeTransformer):
+    def __init__(self, values: Mapping[str, float]):
+        self.values = values
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        if node.id not in self.values:
+            return node
+        # Parsing the repr keeps negative values a unary minus, so unparse
+        # parenthesises them where needed: (-2.0) ** x, not -2.0 ** x.
+        return ast.copy_location(ast.parse(repr(float(self.values[node.id])), mode="eval").body, node)
+
 
 class GraphCalculator:
-    def __init__(self):
+    def __init__(self, cache_bytes: int = 64 * 1024 * 1024, max_compiled: int = 256):
         self.functions: Dict[str, Dict[str, Any]] = {}
         self.constants: Dict[str, float] = {
             "pi": math.pi,
@@ -17,17 +54,269 @@ class GraphCalculator:
             "sqrt": math.sqrt,
             "abs": abs
         }
+        self.array_operations: Dict[str, Any] = {
+            "sin": np.sin,
+            "cos": np.cos,
+            "tan": np.tan,
+            "log": _array_log,
+            "exp": np.exp,
+            "sqrt": np.sqrt,
+            "abs": np.abs
+        }
+        self.compiled_cache = LRUCache(max_entries=max_compiled)
+        self.sample_cache = LRUCache(max_bytes=cache_bytes)
+        self.tile_cache = TileCache(max_bytes=cache_bytes)
+        # Free names in a formula ("a*sin(b*x)") are parameters shared by all
+        # functions; at most one of them is swept as a family over its range.
+        self.parameters: Dict[str, float] = {}
+        self.parameter_ranges: Dict[str, Tuple[float, float]] = {}
+        self.family: Optional[str] = None
+        self.family_size = 16
+
+    def add_function(self, name: str, formula: str, color: str, kind: str = EXPLICIT, **options: Any) -> None:
+        self.functions[name] = {"formula": formula, "color": color, "kind": kind, **options}
+        for parameter in options.get("parameters", ()):
+            self.parameters.setdefault(parameter, 1.0)
+            self.parameter_ranges.setdefault(parameter, (-5.0, 5.0))
 
-    def add_function(self, name: str, formula: str, color: str) -> None:
-        self.functions[name] = {"formula": formula, "color": color}
+    def explicit_functions(self) -> Dict[str, Dict[str, Any]]:
+        functions: Dict[str, Dict[str, Any]] = {}
+        for name, data in self.functions.items():
+            if data.get("kind", EXPLICIT) != EXPLICIT:
+                continue
+            if data.get("parameters"):
+                # Analysis and the shared grid see the curve at the current slider values.
+                data = dict(data, formula=self.bind_parameters(data["formula"]))
+            functions[name] = data
+        return functions
+
+    def active_parameters(self) -> List[str]:
+        return sorted({parameter for data in self.functions.values() for parameter in data.get("parameters", ())})
+
+    def parameter_names(self, formula: str) -> Tuple[str, ...]:
+        try:
+            tree = ast.parse(formula, mode="eval")
+        except SyntaxError:
+            return ()
+        # Only short names (a, b, k2) are parameters; anything longer, such as
+        # a mistyped "sinx", is left to compile() to report as unknown.
+        called = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+        reserved = {"x", "y", "t", *self.constants, *self.array_operations}
+        return tuple(sorted({node.id for node in ast.walk(tree)
+                             if isinstance(node, ast.Name) and id(node) not in called and node.id not in reserved
+                             and re.fullmatch(r"[A-Za-z][0-9]*", node.id)}))
+
+    def bind_parameters(self, formula: str) -> str:
+        tree = _BindParameters(self.parameters).visit(ast.parse(formula, mode="eval"))
+        return ast.unparse(ast.fix_missing_locations(tree))
+
+    def parameter_values(self, parameters: Tuple[str, ...]) -> List[Any]:
+        values: List[Any] = []
+        for parameter in parameters:
+            if parameter == self.family:
+                # A column: broadcasting against the x row gives one curve per member.
+                low, high = self.parameter_ranges[parameter]
+                values.append(np.linspace(low, high, self.family_size)[:, None])
+            else:
+                values.append(self.parameters[parameter])
+        return values
+
+    def parse_function(self, text: str) -> Dict[str, Any]:
+        # "f(x)" is explicit, "F(x, y) = G(x, y)" (or any formula using y) is
+        # implicit, "x(t); y(t)" or "x(t); y(t); t_min; t_max" is parametric.
+        text = text.replace("^", "**").replace("==", "=").strip()
+        if ";" in text:
+            parts = [part.strip() for part in text.split(";")]
+            if len(parts) not in (2, 4):
+                raise ValueError("Параметрическая кривая задаётся как 'x(t); y(t)' или 'x(t); y(t); t_min; t_max'")
+            for part in parts[:2]:
+                self.compile(part, ("t",))
+            t_min, t_max = (0.0, 2 * math.pi) if len(parts) == 2 else (self._constant(parts[2]), self._constant(parts[3]))
+            return {"kind": PARAMETRIC, "formula": f"{parts[0]}; {parts[1]}", "x_formula": parts[0],
+                    "y_formula": parts[1], "t_min": t_min, "t_max": t_max}
+        if "=" in text:
+            left, _, right = text.partition("=")
+            if not left.strip() or not right.strip():
+                raise ValueError("Уравнение задаётся как 'F(x, y) = G(x, y)', обе части непустые")
+            formula = f"({left.strip()}) - ({right.strip()})"
+            self.compile(formula, ("x", "y"))
+            return {"kind": IMPLICIT, "formula": formula, "equation": text}
+        parameters = self.parameter_names(text)
+        try:
+            self.compile(text, ("x", *parameters))
+        except ValueError:
+            # A bare formula in x and y means F(x, y) = 0.
+            self.compile(text, ("x", "y"))
+            return {"kind": IMPLICIT, "formula": text, "equation": f"{text} = 0"}
+        if parameters:
+            return {"kind": EXPLICIT, "formula": text, "parameters": parameters}
+        return {"kind": EXPLICIT, "formula": text}
+
+    def _constant(self, formula: str) -> float:
+        value = float(self.compile(formula, ())())
+        if not math.isfinite(value):
+            raise ValueError(f"Граница параметра '{formula}' должна быть конечным числом")
+        return value
 
     def remove_function(self, name: str) -> None:
         if name in self.functions:
             del self.functions[name]
 
-    def calculate(self, formula: str, x: float) -> Optional[float]:
+    def compile(self, formula: str, variables: Tuple[str, ...] = ("x",)) -> ArrayFunction:
+        key = formula if variables == ("x",) else (variables, formula)
+        compiled = self.compiled_cache.get(key)
+        if compiled is None:
+            compiled = self._build_evaluator(formula, variables)
+            self.compiled_cache.put(key, compiled)
+        return compiled
+
+    def _build_evaluator(self, formula: str, variables: Tuple[str, ...] = ("x",)) -> ArrayFunction:
         try:
-            return eval(formula, {"__builtins__": None}, 
-                        {**self.constants, **self.operations, "x": x})
-        except:
-            return None
\ No newline at end of file
+            code = compile(formula, "<formula>", "eval")
+        except (SyntaxError, ValueError) as error:
+            raise ValueError(f"Синтаксическая ошибка в формуле '{formula}': {error}") from error
+
+        allowed = {*variables, *self.constants, *self.array_operations}
+        unknown = [name for name in code.co_names if name not in allowed]
+        if unknown:
+            raise ValueError(f"Неизвестные имена в формуле '{formula}': {', '.join(unknown)}")
+        if any(isinstance(const, CodeType) for const in code.co_consts):
+            raise ValueError(f"Недопустимая конструкция в формуле '{formula}'")
+
+        namespace: Dict[str, Any] = {"__builtins__": None, **self.constants, **self.array_operations}
+
+        def evaluate(*values: np.ndarray) -> np.ndarray:
+            arrays = [np.asarray(value, dtype=float) for value in values]
+            # Several variables broadcast together: F(x[None, :], y[:, None]) is a grid.
+            shape = np.broadcast_shapes(*(array.shape for array in arrays))
+            with np.errstate(all="ignore"):
+                try:
+                    y_values = np.asarray(eval(code, namespace, dict(zip(variables, arrays))), dtype=float)
+                except (ArithmeticError, TypeError, ValueError):
+                    return np.full(shape, np.nan)
+            if y_values.shape != shape:
+                y_values = np.broadcast_to(y_values, shape).copy()
+            return y_values
+
+        record_name = f"evaluate[{formula}]"
+
+        def instrumented(*values: np.ndarray) -> np.ndarray:
+            if not profiler.enabled:
+                return evaluate(*values)
+            start = time.perf_counter()
+            y_values = evaluate(*values)
+            profiler.record(record_name, time.perf_counter() - start, int(np.size(y_values)))
+            return y_values
+
+        return instrumented
+
+    def compile_interval(self, formula: str, variables: Tuple[str, ...] = ("x",)) -> IntervalFunction:
+        key = ("interval", formula) if variables == ("x",) else ("interval", variables, formula)
+        compiled = self.compiled_cache.get(key)
+        if compiled is None:
+            self.compile(formula, variables)
+            compiled = IntervalCompiler(self.constants).compile(formula, variables)
+            self.compiled_cache.put(key, compiled)
+        return compiled
+
+    def evaluate(self, formula: str, x_values: np.ndarray) -> np.ndarray:
+        try:
+            return self.compile(formula)(x_values)
+        except ValueError:
+            return np.full(np.shape(x_values), np.nan)
+
+    def sample(self, formula: str, x_min: float, x_max: float, num: int) -> Tuple[np.ndarray, np.ndarray]:
+        key = (formula, _cache_key(x_min), _cache_key(x_max), num)
+        cached = self.sample_cache.get(key)
+        if cached is not None:
+            return cached
+        x_values = np.linspace(x_min, x_max, num)
+        y_values = self.evaluate(formula, x_values)
+        x_values.setflags(write=False)
+        y_values.setflags(write=False)
+        self.sample_cache.put(key, (x_values, y_values))
+        return x_values, y_values
+
+    def evaluate_all(self, x_min: float, x_max: float, num: int, dtype: Any = np.float64,
+                     functions: Optional[Mapping[str, Mapping[str, Any]]] = None) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        functions = self.explicit_functions() if functions is None else functions
+        names = list(functions)
+        formulas = tuple(functions[name]["formula"] for name in names)
+        dtype = np.dtype(dtype)
+        key = ("grid", formulas, _cache_key(x_min), _cache_key(x_max), num, dtype.str)
+        cached = self.sample_cache.get(key)
+        if cached is not None:
+            return names, cached[0], cached[1]
+        # One shared grid and one (functions x samples) block; float32 halves
+        # the footprint for display, while evaluation itself stays float64.
+        x_values = np.linspace(x_min, x_max, num)
+        y_values = np.empty((len(formulas), num), dtype=dtype)
+        for row, formula in enumerate(formulas):
+            y_values[row] = self.evaluate(formula, x_values)
+        x_values.setflags(write=False)
+        y_values.setflags(write=False)
+        self.sample_cache.put(key, (x_values, y_values))
+        return names, x_values, y_values
+
+    def sample_tiled(self, formula: str, x_min: float, x_max: float, num: int,
+                     y_range: Optional[Tuple[float, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        try:
+            evaluator = self.compile(formula)
+        except ValueError:
+            return self.sample(formula, x_min, x_max, 2)
+        if y_range is not None:
+            y_range = (_cache_key(y_range[0]), _cache_key(y_range[1]))
+        return self.tile_cache.sample(evaluator, formula, x_min, x_max, num, y_range, self.compile_interval(formula))
+
+    def trace_implicit(self, formula: str, x_min: float, x_max: float, y_min: float, y_max: float,
+                       cells: Tuple[int, int] = (128, 128), levels: int = 3) -> np.ndarray:
+        key = ("implicit", formula, _cache_key(x_min), _cache_key(x_max), _cache_key(y_min), _cache_key(y_max),
+               cells, levels)
+        cached = self.sample_cache.get(key)
+        if cached is not None:
+            return cached
+        segments = implicit_segments(self.compile(formula, ("x", "y")), x_min, x_max, y_min, y_max, cells, levels,
+                                     self.compile_interval(formula, ("x", "y")))
+        segments.setflags(write=False)
+        self.sample_cache.put(key, segments)
+        return segments
+
+    def sample_parametric(self, x_formula: str, y_formula: str, t_min: float, t_max: float,
+                          num: int) -> Tuple[np.ndarray, np.ndarray]:
+        key = ("parametric", x_formula, y_formula, _cache_key(t_min), _cache_key(t_max), num)
+        cached = self.sample_cache.get(key)
+        if cached is not None:
+            return cached
+        t_values = np.linspace(t_min, t_max, num)
+        x_values = self.compile(x_formula, ("t",))(t_values)
+        y_values = self.compile(y_formula, ("t",))(t_values)
+        x_values.setflags(write=False)
+        y_values.setflags(write=False)
+        self.sample_cache.put(key, (x_values, y_values))
+        return x_values, y_values
+
+    def sample_parameters(self, formula: str, parameters: Tuple[str, ...], x_min: float, x_max: float,
+                          num: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Not cached: slider values change on every frame of a drag. The
+        # formula is compiled once with the parameters as extra arguments, and
+        # a family comes back as one (members x samples) array from one call.
+        x_values = np.linspace(x_min, x_max, num)
+        try:
+            evaluator = self.compile(formula, ("x", *parameters))
+        except ValueError:
+            return x_values, np.full(num, np.nan)
+        return x_values, evaluator(x_values, *self.parameter_values(parameters))
+
+    def set_cache_budget(self, cache_bytes: int) -> None:
+        # Explicit curves are plotted from tiles, everything else from samples.
+        self.sample_cache.resize(max_bytes=cache_bytes)
+        self.tile_cache.resize(cache_bytes)
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        return {"compiled": self.compiled_cache.stats(), "samples": self.sample_cache.stats(),
+                "tiles": self.tile_cache.stats()}
+
+    @profiler.timed("GraphCalculator.calculate")
+    def calculate(self, formula: str, x: float) -> Optional[float]:
+        value = float(self.evaluate(formula, np.asarray(x, dtype=float)))
+        return value if math.isfinite(value) else None
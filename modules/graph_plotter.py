@@ -1,52 +1,339 @@
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.artist import Artist
+from matplotlib.collections import LineCollection
+from matplotlib.colors import same_color
+from matplotlib.lines import Line2D
 import numpy as np
-from typing import Tuple
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+from modules.instrumentation import profiler
+from modules.curves import EXPLICIT, IMPLICIT
+from modules.render_prep import prepare_polyline
 
 class GraphPlotter:
-    def __init__(self, master):
-        self.figure, self.ax = plt.subplots()
-        self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+    def __init__(self, master=None):
+        self.figure = Figure()
+        self.ax = self.figure.add_subplot()
+        if master is None:
+            # Headless use (benchmarks, exports): render with plain Agg, no Tk.
+            self.canvas = FigureCanvasAgg(self.figure)
+        else:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+            self.canvas.get_tk_widget().pack(side="top", fill="both", expand=True)
         self.canvas.draw()
-        self.canvas.get_tk_widget().pack(side="top", fill="both", expand=True)
         self.world_coords = (-10, -10, 10, 10)
+        self.num_points = 1000
+        self.sampling_mode = "adaptive"
+        self.points_per_pixel = 4
+        self.preview_points = 256
+        self.implicit_cells = 128
+        self.implicit_levels = 3
+        # Explicit and parametric curves are Line2D, implicit curves and
+        # parameter families LineCollection.
+        self.lines: Dict[str, Artist] = {}
+        self.background = None
+        # The view the cached background was drawn for.
+        self.background_coords: Optional[Tuple[float, float, float, float]] = None
+        self.needs_full_draw = True
+        self.drag_start: Optional[Tuple[float, float, Tuple[float, float, float, float]]] = None
+        self.on_viewport_change: Optional[Callable[[], None]] = None
+        self.on_drag_end: Optional[Callable[[], None]] = None
+        self.canvas.mpl_connect('draw_event', self.on_draw)
         self.setup_plot()
 
     def setup_plot(self):
         self.ax.clear()
-        self.ax.set_xlim(self.world_coords[0], self.world_coords[2])
-        self.ax.set_ylim(self.world_coords[1], self.world_coords[3])
+        self.lines.clear()
         self.ax.grid(True)
         self.ax.axhline(y=0, color='k')
         self.ax.axvline(x=0, color='k')
+        self.apply_viewport()
+        self.needs_full_draw = True
+
+    def apply_viewport(self) -> None:
+        # redraw compares the view with the one of the cached background, so
+        # setting the same limits again costs no full draw.
+        self.ax.set_xlim(self.world_coords[0], self.world_coords[2])
+        self.ax.set_ylim(self.world_coords[1], self.world_coords[3])
+
+    def compute_samples(self, calculator: 'GraphCalculator', functions: Mapping[str, Mapping[str, Any]],
+                        world_coords: Optional[Tuple[float, float, float, float]] = None,
+                        preview: bool = False) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        # Touches no artists, so refinements can run off the Tk thread.
+        x1, y1, x2, y2 = world_coords or self.world_coords
+        explicit = {name: data for name, data in functions.items()
+                    if data.get("kind", EXPLICIT) == EXPLICIT and not data.get("parameters")}
+        if preview:
+            names, x, y_rows = calculator.evaluate_all(x1, x2, self.preview_points, np.float32, explicit)
+            samples: Dict[str, Any] = {name: (x, y) for name, y in zip(names, y_rows)}
+        else:
+            samples = {name: self._sample_tiles(calculator, name, function_data["formula"], (x1, y1, x2, y2))
+                       for name, function_data in explicit.items()}
+        for name, function_data in functions.items():
+            if name not in explicit:
+                samples[name] = self._sample_curve(calculator, name, function_data, (x1, y1, x2, y2), preview)
+        return profiler.call("GraphPlotter.prepare", self.prepare_samples, functions, samples, (x1, y1, x2, y2))
+
+    def prepare_samples(self, functions: Mapping[str, Mapping[str, Any]], samples: Dict[str, Any],
+                        world_coords: Tuple[float, float, float, float]) -> Dict[str, Any]:
+        # Matplotlib gets only what can show up on screen: curves are clipped
+        # to the view, broken at non-finite values and cut down to a few
+        # points per pixel column, so drawing scales with the canvas width.
+        columns = max(int(self.ax.bbox.width), 1)
+        for name, function_data in functions.items():
+            if function_data.get("kind", EXPLICIT) == IMPLICIT:
+                continue
+            x, y = samples[name]
+            if np.ndim(y) == 2:
+                # A parameter family: one polyline per member, all in one collection.
+                samples[name] = [np.column_stack(prepare_polyline(x, row, world_coords, columns)) for row in y]
+            else:
+                samples[name] = prepare_polyline(x, y, world_coords, columns)
+        return samples
+
+    @profiler.timed("GraphPlotter.plot_function", label=lambda self, calculator, name, *args: name)
+    def _sample_curve(self, calculator: 'GraphCalculator', name: str, function_data: Mapping[str, Any],
+                      world_coords: Tuple[float, float, float, float], preview: bool) -> Any:
+        x1, y1, x2, y2 = world_coords
+        if function_data.get("parameters"):
+            num = self.preview_points if preview else self.point_budget()
+            return calculator.sample_parameters(function_data["formula"], function_data["parameters"], x1, x2, num)
+        if function_data["kind"] == IMPLICIT:
+            # The pixel aspect is kept: cells are square on screen.
+            columns = self.implicit_cells // 2 if preview else self.implicit_cells
+            rows = max(int(columns * self.ax.bbox.height / max(self.ax.bbox.width, 1)), 1)
+            levels = 0 if preview else self.implicit_levels
+            return calculator.trace_implicit(function_data["formula"], x1, x2, y1, y2, (columns, rows), levels)
+        num = self.preview_points if preview else self.point_budget()
+        return calculator.sample_parametric(function_data["x_formula"], function_data["y_formula"],
+                                            function_data["t_min"], function_data["t_max"], num)
+
+    @profiler.timed("GraphPlotter.plot_function", label=lambda self, calculator, name, *args: name)
+    def _sample_tiles(self, calculator: 'GraphCalculator', name: str, formula: str,
+                      world_coords: Tuple[float, float, float, float]) -> Tuple[np.ndarray, np.ndarray]:
+        # Tiles are aligned to the x axis rather than to the view, so a pan
+        # reuses every tile that stays visible and computes only the new ones.
+        x1, y1, x2, y2 = world_coords
+        if self.sampling_mode == "adaptive":
+            return calculator.sample_tiled(formula, x1, x2, self.point_budget(), (y1, y2))
+        return calculator.sample_tiled(formula, x1, x2, self.num_points)
+
+    def plot_function(self, calculator: 'GraphCalculator', name: str, formula: str, color: str,
+                      kind: str = EXPLICIT, **options: Any) -> None:
+        self.plot_functions(calculator, {name: {"formula": formula, "color": color, "kind": kind, **options}})
+
+    def plot_functions(self, calculator: 'GraphCalculator', functions: Mapping[str, Mapping[str, Any]]) -> None:
+        # Unlike update_functions, curves that are not listed stay as they are.
+        if self.apply_samples(functions, self.compute_samples(calculator, functions)):
+            self.update_legend()
+
+    def update_functions(self, calculator: 'GraphCalculator', functions: Mapping[str, Mapping[str, Any]],
+                         preview: bool = False) -> None:
+        self.show_samples(functions, self.compute_samples(calculator, functions, preview=preview))
+
+    def show_samples(self, functions: Mapping[str, Mapping[str, Any]],
+                     samples: Mapping[str, Any]) -> None:
+        changed = False
+        for name in [name for name in self.lines if name not in functions]:
+            self.lines.pop(name).remove()
+            changed = True
+        changed |= self.apply_samples(functions, samples)
+        if changed:
+            self.update_legend()
+
+    def apply_samples(self, functions: Mapping[str, Mapping[str, Any]],
+                      samples: Mapping[str, Any]) -> bool:
+        changed = False
+        for name, function_data in functions.items():
+            if name not in samples:
+                continue
+            if function_data.get("kind", EXPLICIT) == IMPLICIT or isinstance(samples[name], list):
+                changed |= self._set_segments(name, function_data["color"], samples[name])
+            else:
+                changed |= self._set_line(name, function_data["color"], *samples[name])
+        return changed
+
+    def remove_function(self, name: str) -> None:
+        line = self.lines.pop(name, None)
+        if line is not None:
+            line.remove()
+            self.update_legend()
+
+    def update_legend(self) -> None:
+        self.needs_full_draw = True
+        if self.lines:
+            self.ax.legend(handles=list(self.lines.values()))
+        elif self.ax.get_legend() is not None:
+            self.ax.get_legend().remove()
+
+    def _set_line(self, name: str, color: str, x: np.ndarray, y: np.ndarray) -> bool:
+        line = self.lines.get(name)
+        if not isinstance(line, Line2D):
+            self._drop_artist(name)
+            self.lines[name] = self.ax.plot(x, y, label=name, color=color, animated=True)[0]
+            return True
+        line.set_data(x, y)
+        return self._set_color(line, color)
+
+    def _set_segments(self, name: str, color: str, segments: np.ndarray) -> bool:
+        collection = self.lines.get(name)
+        if not isinstance(collection, LineCollection):
+            self._drop_artist(name)
+            collection = LineCollection(segments, colors=color, label=name, animated=True)
+            self.ax.add_collection(collection, autolim=False)
+            self.lines[name] = collection
+            return True
+        collection.set_segments(segments)
+        return self._set_color(collection, color)
 
-    def plot_function(self, calculator: 'GraphCalculator', name: str, formula: str, color: str) -> None:
-        x = np.linspace(self.world_coords[0], self.world_coords[2], 1000)
-        y = [calculator.calculate(formula, xi) for xi in x]
-        self.ax.plot(x, y, label=name, color=color)
-        self.ax.legend()
+    def _set_color(self, artist: Artist, color: str) -> bool:
+        if same_color(artist.get_color(), color):
+            return False
+        artist.set_color(color)
+        return True
+
+    def _drop_artist(self, name: str) -> None:
+        artist = self.lines.pop(name, None)
+        if artist is not None:
+            artist.remove()
+
+    def point_budget(self) -> int:
+        pixel_width = max(int(self.ax.bbox.width), 100)
+        return pixel_width * self.points_per_pixel
 
     def clear(self) -> None:
-        self.setup_plot()
+        for line in self.lines.values():
+            line.remove()
+        self.lines.clear()
+        self.update_legend()
 
+    @profiler.timed("GraphPlotter.redraw")
     def redraw(self):
-        self.canvas.draw()
+        # Function curves are animated artists: a full draw renders the static
+        # parts (grid, axes, legend) and caches them as the blit background,
+        # so updates that only change curve data just repaint the curves.
+        # New limits move the grid and the ticks; while the view is dragged,
+        # the cached background is shifted instead and the full draw waits
+        # for the release.
+        if self.needs_full_draw or self.background is None:
+            self.canvas.draw()
+        elif self.world_coords == self.background_coords:
+            self.blit()
+        elif self.drag_start is not None and self.pan_offset() is not None:
+            self.blit(self.pan_offset())
+        else:
+            self.canvas.draw()
+
+    def blit(self, offset: Optional[Tuple[int, int]] = None) -> None:
+        self.canvas.restore_region(self.background)
+        if offset is not None:
+            self.shift_background(*offset)
+        self.draw_lines()
+        self.canvas.blit(self.figure.bbox)
+
+    def pan_offset(self) -> Optional[Tuple[int, int]]:
+        # The shift of the view since the background was drawn, in pixels;
+        # None unless the view was only moved, not zoomed.
+        x1, y1, x2, y2 = self.world_coords
+        old_x1, old_y1, old_x2, old_y2 = self.background_coords
+        if not (np.isclose(x2 - x1, old_x2 - old_x1) and np.isclose(y2 - y1, old_y2 - old_y1)):
+            return None
+        bbox = self.ax.bbox
+        return round((old_x1 - x1) / (x2 - x1) * bbox.width), round((old_y1 - y1) / (y2 - y1) * bbox.height)
+
+    def shift_background(self, shift_x: int, shift_y: int) -> None:
+        # The data area of the background moved by whole pixels: the grid and
+        # the axis lines stay exact, the strip the pan uncovers stays blank
+        # and the tick labels stale until the full draw. Buffer rows run top
+        # down, and the inset keeps the spines out of the moved block.
+        height = self.figure.bbox.height
+        left, bottom, right, top = self.ax.bbox.extents
+        x1, x2 = int(np.ceil(left)) + 2, int(right) - 2
+        y1, y2 = int(np.ceil(height - top)) + 2, int(height - bottom) - 2
+        source = (max(x1, x1 - shift_x), max(y1, y1 + shift_y), min(x2, x2 - shift_x), min(y2, y2 + shift_y))
+        self.ax.draw_artist(self.ax.patch)
+        if source[0] < source[2] and source[1] < source[3]:
+            self.canvas.restore_region(self.background, bbox=source, xy=(shift_x, -shift_y))
+        for spine in self.ax.spines.values():
+            self.ax.draw_artist(spine)
+
+    def draw_lines(self) -> None:
+        for line in self.lines.values():
+            self.ax.draw_artist(line)
 
-    def zoom(self, factor: float) -> None:
+    def on_draw(self, event) -> None:
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.background_coords = self.world_coords
+        self.needs_full_draw = False
+        self.draw_lines()
+
+    def connect_navigation(self, on_viewport_change: Callable[[], None],
+                           on_drag_end: Optional[Callable[[], None]] = None) -> None:
+        self.on_viewport_change = on_viewport_change
+        self.on_drag_end = on_drag_end
+        self.canvas.mpl_connect('button_press_event', self.on_press)
+        self.canvas.mpl_connect('motion_notify_event', self.on_motion)
+        self.canvas.mpl_connect('button_release_event', self.on_release)
+        self.canvas.mpl_connect('scroll_event', self.on_scroll)
+
+    def on_press(self, event) -> None:
+        if event.button == 1 and event.inaxes is self.ax:
+            self.drag_start = (event.x, event.y, self.world_coords)
+
+    def on_motion(self, event) -> None:
+        if self.drag_start is None:
+            return
+        start_x, start_y, (x1, y1, x2, y2) = self.drag_start
+        bbox = self.ax.bbox
+        shift_x = float((event.x - start_x) / bbox.width * (x2 - x1))
+        shift_y = float((event.y - start_y) / bbox.height * (y2 - y1))
+        self.world_coords = (x1 - shift_x, y1 - shift_y, x2 - shift_x, y2 - shift_y)
+        self.apply_viewport()
+        self.notify_viewport_change()
+
+    def on_release(self, event) -> None:
+        if self.drag_start is None:
+            return
+        self.drag_start = None
+        # The last frame of the drag may still be waiting for its turn;
+        # rendering it now makes it the full draw that ends the drag.
+        if self.on_drag_end is not None:
+            self.on_drag_end()
+        if self.background is not None and self.world_coords != self.background_coords:
+            self.redraw()
+
+    def on_scroll(self, event) -> None:
+        if event.inaxes is not self.ax:
+            return
+        factor = 0.8 if event.button == 'up' else 1.25
+        self.zoom(factor, center=(float(event.xdata), float(event.ydata)))
+        self.notify_viewport_change()
+
+    def notify_viewport_change(self) -> None:
+        if self.on_viewport_change is not None:
+            self.on_viewport_change()
+
+    def zoom(self, factor: float, center: Optional[Tuple[float, float]] = None) -> None:
         x1, y1, x2, y2 = self.world_coords
-        center_x, center_y = (x1 + x2) / 2, (y1 + y2) / 2
-        new_width, new_height = (x2 - x1) * factor, (y2 - y1) * factor
-        new_x1, new_y1 = center_x - new_width / 2, center_y - new_height / 2
-        new_x2, new_y2 = center_x + new_width / 2, center_y + new_height / 2
+        if center is None:
+            center = ((x1 + x2) / 2, (y1 + y2) / 2)
+        # The center point keeps its relative position on screen, so zooming
+        # around the cursor keeps the point under it fixed.
+        center_x, center_y = center
+        new_x1 = center_x - (center_x - x1) * factor
+        new_x2 = center_x + (x2 - center_x) * factor
+        new_y1 = center_y - (center_y - y1) * factor
+        new_y2 = center_y + (y2 - center_y) * factor
         self.world_coords = (new_x1, new_y1, new_x2, new_y2)
-        self.setup_plot()
+        self.apply_viewport()
 
     def move(self, dx: float, dy: float) -> None:
         x1, y1, x2, y2 = self.world_coords
         move_x = (x2 - x1) * dx * 0.1
         move_y = (y2 - y1) * dy * 0.1
         self.world_coords = (x1 + move_x, y1 + move_y, x2 + move_x, y2 + move_y)
-        self.setup_plot()
+        self.apply_viewport()
 
     def get_world_coords(self) -> Tuple[float, float, float, float]:
         return self.world_coords
\ No newline at end of file
@@ -1,12 +1,18 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, colorchooser
+from tkinter import ttk, filedialog, messagebox, colorchooser, simpledialog
 from modules.graph_calculator import GraphCalculator
 from modules.graph_plotter import GraphPlotter
 from modules.function_input import FunctionInputDialog
-from modules.graph_analysis import GraphAnalyzer
-import threading
+from modules.analysis_executor import AnalysisExecutor, AnalysisJob
+from modules.result_cache import AnalysisResultCache
+from modules.export import export_analysis, export_samples
+from modules.render_scheduler import RenderScheduler
+from modules.progressive_renderer import ProgressiveRenderer
+from modules.instrumentation import profiler
 import queue
+import sqlite3
+import threading
 
 class GraphCalculatorGUI:
     def __init__(self, master: tk.Tk):
@@ -16,10 +22,48 @@ class GraphCalculatorGUI:
 
         self.calculator = GraphCalculator()
         self.current_color: Optional[str] = "#000000"
+        self.analysis_executor: Optional[AnalysisExecutor] = None
+        self.analysis_job: Optional[AnalysisJob] = None
+        self.result_cache: Optional[AnalysisResultCache] = self.open_result_cache()
+        # A double-clicked function is shown alone until it is double-clicked again.
+        self.isolated: Optional[str] = None
         
         self.create_widgets()
         
         self.plotter = GraphPlotter(self.canvas)
+        self.render_scheduler = RenderScheduler(self.master, self.redraw_all_functions)
+        self.parameter_scheduler = RenderScheduler(self.master, self.redraw_parameter_functions)
+        self.progressive_renderer = ProgressiveRenderer(self.master, self.plotter, self.calculator,
+                                                        on_refined=self.on_refined, functions=self.visible_functions)
+        self.plotter.connect_navigation(self.on_viewport_change, self.render_scheduler.flush)
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
+        # The window and empty plot come first; the analysis workers are
+        # started in the background once the main loop is idle.
+        self.master.after(500, self.warm_up)
+
+    def warm_up(self) -> None:
+        if self.analysis_executor is None:
+            self.analysis_executor = AnalysisExecutor(result_cache=self.result_cache)
+        threading.Thread(target=self.analysis_executor.warm_up, daemon=True).start()
+
+    def open_result_cache(self) -> Optional[AnalysisResultCache]:
+        try:
+            return AnalysisResultCache()
+        except (OSError, sqlite3.Error):
+            # Without a writable home directory analysis simply is not cached.
+            return None
+
+    def on_close(self) -> None:
+        # The job and the executor go first: their callbacks write to the
+        # result cache, which is closed only after they are stopped.
+        self.cancel_analysis()
+        self.progressive_renderer.shutdown()
+        if self.analysis_executor is not None:
+            self.analysis_executor.shutdown()
+            self.analysis_executor = None
+        if self.result_cache is not None:
+            self.result_cache.close()
+        self.master.destroy()
 
     def create_widgets(self) -> None:
         self.main_frame = ttk.Frame(self.master)
@@ -52,6 +96,20 @@ class GraphCalculatorGUI:
         self.analyze_button = ttk.Button(self.function_frame, text="Анализировать", command=self.analyze_graphs)
         self.analyze_button.pack()
 
+        self.high_precision = tk.BooleanVar(value=False)
+        self.high_precision_check = ttk.Checkbutton(self.function_frame, text="Точное интегрирование (quad)", variable=self.high_precision)
+        self.high_precision_check.pack()
+
+        self.clear_cache_button = ttk.Button(self.function_frame, text="Очистить кэш анализа", command=self.clear_result_cache)
+        self.clear_cache_button.pack()
+
+        self.export_button = ttk.Button(self.function_frame, text="Экспорт точек", command=self.export_samples)
+        self.export_button.pack()
+
+        self.parameter_frame = ttk.LabelFrame(self.function_frame, text="Параметры")
+        self.parameter_labels: Dict[str, ttk.Label] = {}
+        self.family_parameter = tk.StringVar(value="")
+
     def create_canvas(self) -> None:
         self.canvas = tk.Canvas(self.main_frame, width=600, height=400)
         self.canvas.pack(side="left", fill=tk.BOTH, expand=True)
@@ -84,6 +142,19 @@ class GraphCalculatorGUI:
         self.coords_label = ttk.Label(self.control_frame, text="")
         self.coords_label.pack(pady=10)
 
+        self.progressive = tk.BooleanVar(value=True)
+        self.progressive_check = ttk.Checkbutton(self.control_frame, text="Прогрессивная отрисовка", variable=self.progressive,
+                                                 command=self.toggle_progressive)
+        self.progressive_check.pack()
+
+        self.profiling = tk.BooleanVar(value=False)
+        self.profiling_check = ttk.Checkbutton(self.control_frame, text="Профилирование", variable=self.profiling,
+                                               command=self.toggle_profiling)
+        self.profiling_check.pack()
+
+        self.profile_label = ttk.Label(self.control_frame, text="", justify=tk.LEFT, font=("TkFixedFont", 8))
+        self.profile_button = ttk.Button(self.control_frame, text="Сохранить профиль", command=self.save_profile)
+
     def open_function_dialog(self) -> None:
         dialog = FunctionInputDialog(self.master)
         result = dialog.show()
@@ -95,12 +166,28 @@ class GraphCalculatorGUI:
 
     def add_function(self, formula: str) -> None:
         if formula:
-            name = f"f{len(self.calculator.functions) + 1}(x)"
-            formula = formula.replace('^', '**')
-            self.calculator.add_function(name, formula, self.current_color)
-            self.function_listbox.insert(tk.END, f"{name}: {formula} ({self.current_color})")
-            self.plotter.plot_function(self.calculator, name, formula, self.current_color)
+            try:
+                spec = self.calculator.parse_function(formula)
+            except ValueError as error:
+                messagebox.showerror("Ошибка", str(error))
+                return
+            kind = spec.pop("kind")
+            formula = spec.pop("formula")
+            variables = {"explicit": "x", "implicit": "x,y", "parametric": "t"}[kind]
+            name = f"f{len(self.calculator.functions) + 1}({variables})"
+            self.calculator.add_function(name, formula, self.current_color, kind, **spec)
+            if self.isolated is not None:
+                self.isolated = None
+                self.render_scheduler.request()
+            if kind == "parametric":
+                description = f"{formula}, t ∈ [{spec['t_min']:.4g}, {spec['t_max']:.4g}]"
+            else:
+                description = spec.get("equation", formula)
+            self.function_listbox.insert(tk.END, f"{name}: {description} ({self.current_color})")
+            self.plotter.plot_function(self.calculator, name, **self.calculator.functions[name])
             self.plotter.redraw()
+            self.progressive_renderer.refresh()
+            self.update_parameter_sliders()
 
     def remove_function(self) -> None:
         selection = self.function_listbox.curselection()
@@ -108,72 +195,213 @@ class GraphCalculatorGUI:
             index = selection[0]
             name = self.function_listbox.get(index).split(":")[0]
             self.calculator.remove_function(name)
+            if self.isolated == name:
+                self.isolated = None
+                self.render_scheduler.request()
             self.function_listbox.delete(index)
-            self.redraw_all_functions()
+            self.plotter.remove_function(name)
+            self.plotter.redraw()
+            self.progressive_renderer.refresh()
+            self.update_parameter_sliders()
 
     def clear_all(self) -> None:
         self.calculator.functions.clear()
+        self.isolated = None
         self.function_listbox.delete(0, tk.END)
         self.plotter.clear()
         self.plotter.redraw()
+        self.progressive_renderer.refresh()
+        self.update_parameter_sliders()
+
+    def update_parameter_sliders(self) -> None:
+        for child in self.parameter_frame.winfo_children():
+            child.destroy()
+        self.parameter_labels.clear()
+        parameters = self.calculator.active_parameters()
+        if self.calculator.family not in parameters:
+            self.calculator.family = None
+            self.family_parameter.set("")
+        if not parameters:
+            self.parameter_frame.pack_forget()
+            return
+        self.parameter_frame.pack(fill="x", pady=10)
+        for row, name in enumerate(parameters):
+            low, high = self.calculator.parameter_ranges[name]
+            value = self.calculator.parameters[name]
+            ttk.Label(self.parameter_frame, text=name).grid(row=row, column=0, padx=2)
+            ttk.Scale(self.parameter_frame, from_=low, to=high, value=value, orient=tk.HORIZONTAL, length=150,
+                      command=lambda value, name=name: self.on_parameter_change(name, value)).grid(row=row, column=1)
+            self.parameter_labels[name] = ttk.Label(self.parameter_frame, text=f"{value:.3g}", width=6)
+            self.parameter_labels[name].grid(row=row, column=2)
+            ttk.Radiobutton(self.parameter_frame, text="семейство", variable=self.family_parameter, value=name,
+                            command=self.on_family_change).grid(row=row, column=3)
+        ttk.Radiobutton(self.parameter_frame, text="Без семейства", variable=self.family_parameter, value="",
+                        command=self.on_family_change).grid(row=len(parameters), column=0, columnspan=4, sticky="w")
+
+    def on_parameter_change(self, name: str, value: str) -> None:
+        # Analysis results describe the old parameter values, like after a viewport change.
+        self.cancel_analysis()
+        self.calculator.parameters[name] = float(value)
+        self.parameter_labels[name].config(text=f"{float(value):.3g}")
+        self.parameter_scheduler.request()
+
+    def on_family_change(self) -> None:
+        self.calculator.family = self.family_parameter.get() or None
+        self.parameter_scheduler.request()
+
+    def redraw_parameter_functions(self) -> None:
+        # Only the curves using parameters change: the others keep their
+        # artists, so a slider drag is a full-resolution evaluation and a blit.
+        functions = {name: data for name, data in self.visible_functions().items() if data.get("parameters")}
+        self.progressive_renderer.refresh()
+        self.plotter.plot_functions(self.calculator, functions)
+        self.plotter.redraw()
 
     def redraw_all_functions(self) -> None:
-        self.plotter.clear()
-        for name, function_data in self.calculator.functions.items():
-            self.plotter.plot_function(self.calculator, name, function_data["formula"], function_data["color"])
-        self.plotter.redraw()
+        profiler.call("frame", self.render_frame)
         self.update_coords_label()
+        if profiler.enabled:
+            self.update_profile_label()
+
+    def render_frame(self) -> None:
+        if self.progressive.get():
+            self.progressive_renderer.render()
+            return
+        self.plotter.update_functions(self.calculator, self.visible_functions())
+        self.plotter.redraw()
+
+    def visible_functions(self) -> Dict[str, Dict[str, Any]]:
+        if self.isolated in self.calculator.functions:
+            return {self.isolated: self.calculator.functions[self.isolated]}
+        return self.calculator.functions
+
+    def on_refined(self) -> None:
+        if profiler.enabled:
+            self.update_profile_label()
+
+    def toggle_progressive(self) -> None:
+        if not self.progressive.get():
+            self.progressive_renderer.cancel_idle()
+        self.render_scheduler.request()
+
+    def toggle_profiling(self) -> None:
+        profiler.enabled = self.profiling.get()
+        if profiler.enabled:
+            profiler.reset()
+            self.profile_label.pack(pady=5, fill="x")
+            self.profile_button.pack()
+            self.update_profile_label()
+        else:
+            self.profile_label.pack_forget()
+            self.profile_button.pack_forget()
+
+    def update_profile_label(self) -> None:
+        frame = profiler.get("frame")
+        lines = [f"Кадр: {frame['last_seconds'] * 1000:.1f} мс" if frame else "Кадр: —"]
+        for name, function_data in self.calculator.functions.items():
+            plot = profiler.get(f"GraphPlotter.plot_function[{name}]")
+            evaluate = profiler.get(f"evaluate[{function_data['formula']}]")
+            plot_text = f"{plot['last_seconds'] * 1000:.1f} мс" if plot else "—"
+            evaluations = int(evaluate['evaluations']) if evaluate else 0
+            lines.append(f"{name}: {plot_text}, вычислений {evaluations}")
+        self.profile_label.config(text="\n".join(lines))
+
+    def save_profile(self) -> None:
+        file_path = filedialog.asksaveasfilename(defaultextension=".json",
+                                                 filetypes=[("JSON files", "*.json"), ("All files", "*.*")])
+        if file_path:
+            profiler.dump(file_path)
+
+    def on_viewport_change(self) -> None:
+        # Analysis results describe the old viewport, so outstanding work is dropped.
+        self.cancel_analysis()
+        self.render_scheduler.request()
 
     def zoom_in(self) -> None:
         self.plotter.zoom(0.8)
-        self.redraw_all_functions()
+        self.on_viewport_change()
 
     def zoom_out(self) -> None:
         self.plotter.zoom(1.25)
-        self.redraw_all_functions()
+        self.on_viewport_change()
 
     def move(self, dx: float, dy: float) -> None:
         self.plotter.move(dx, dy)
-        self.redraw_all_functions()
+        self.on_viewport_change()
 
     def update_coords_label(self) -> None:
         coords = self.plotter.get_world_coords()
         self.coords_label.config(text=f"X: [{coords[0]:.2f}, {coords[2]:.2f}]\nY: [{coords[1]:.2f}, {coords[3]:.2f}]")
     
     def analyze_graphs(self) -> None:
-        if not self.calculator.functions:
+        functions = self.calculator.explicit_functions()
+        if not functions:
             messagebox.showinfo("Анализ", "Нет функций для анализа.")
             return
 
+        self.cancel_analysis()
+        if self.analysis_executor is None:
+            self.analysis_executor = AnalysisExecutor(result_cache=self.result_cache)
+        settings = {"integration_mode": "quad" if self.high_precision.get() else "grid"}
+        world_coords = self.plotter.get_world_coords()
+        job = self.analysis_executor.submit(functions, world_coords, settings,
+                                            profile=profiler.enabled)
+        self.analysis_job = job
+
         progress_window = tk.Toplevel(self.master)
         progress_window.title("Анализ")
+        # Closing the window cancels like the button; the poll below then
+        # destroys it.
+        progress_window.protocol("WM_DELETE_WINDOW", self.cancel_analysis)
         progress_label = ttk.Label(progress_window, text="Выполняется анализ...")
         progress_label.pack(padx=20, pady=20)
-        progress_bar = ttk.Progressbar(progress_window, mode='indeterminate')
+        progress_bar = ttk.Progressbar(progress_window, mode='determinate', maximum=max(job.total_tasks, 1))
         progress_bar.pack(padx=20, pady=10)
-        progress_bar.start()
-
-        result_queue = queue.Queue()
+        cancel_button = ttk.Button(progress_window, text="Отмена", command=self.cancel_analysis)
+        cancel_button.pack(pady=10)
 
-        def analyze_thread():
-            analyzer = GraphAnalyzer(self.calculator, self.plotter.get_world_coords())
-            results = analyzer.analyze()
-            result_queue.put(results)
-
-        threading.Thread(target=analyze_thread, daemon=True).start()
+        results: Dict[str, Dict[str, Any]] = {}
+        results_view: Dict[str, Any] = {}
 
         def check_result():
-            try:
-                results = result_queue.get_nowait()
+            if not progress_window.winfo_exists():
+                return
+            while True:
+                try:
+                    name, data = job.results.get_nowait()
+                except queue.Empty:
+                    break
+                if data is None:
+                    continue
+                results[name] = data
+                if not results_view:
+                    results_view["notebook"] = self.create_results_window(results, functions, world_coords)
+                self.add_result_tab(results_view["notebook"], name, data)
+
+            if job.done and job.results.empty():
                 progress_window.destroy()
-                self.show_analysis_results(results)
-            except queue.Empty:
-                self.master.after(100, check_result)
-
+                if not results and not job.cancelled:
+                    messagebox.showinfo("Анализ", "Не удалось проанализировать функции.")
+                return
+            progress_bar['value'] = job.completed_tasks
+            progress_label.config(text=f"Выполнено задач: {job.completed_tasks} из {job.total_tasks}")
+            self.master.after(100, check_result)
 
         self.master.after(100, check_result)
 
-    def show_analysis_results(self, results: Dict[str, Dict[str, Any]]) -> None:
+    def clear_result_cache(self) -> None:
+        if self.result_cache is not None:
+            self.result_cache.invalidate()
+        messagebox.showinfo("Анализ", "Кэш результатов анализа очищен.")
+
+    def cancel_analysis(self) -> None:
+        if self.analysis_job is not None:
+            self.analysis_job.cancel()
+            self.analysis_job = None
+
+    def create_results_window(self, results: Dict[str, Dict[str, Any]],
+                              functions: Optional[Dict[str, Dict[str, Any]]] = None,
+                              world_coords: Optional[Tuple[float, float, float, float]] = None) -> ttk.Notebook:
         analysis_window = tk.Toplevel(self.master)
         analysis_window.title("Результаты анализа")
         analysis_window.geometry("700x700")
@@ -181,62 +409,94 @@ class GraphCalculatorGUI:
         notebook = ttk.Notebook(analysis_window)
         notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-        for name, data in results.items():
-            frame = ttk.Frame(notebook)
-            notebook.add(frame, text=name)
+        save_button = ttk.Button(analysis_window, text="Сохранить результаты", command=lambda: self.save_analysis_results(results, functions, world_coords))
+        save_button.pack(pady=10)
+        return notebook
 
-            text_widget = tk.Text(frame, wrap=tk.WORD, width=80, height=25)
-            text_widget.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+    def add_result_tab(self, notebook: ttk.Notebook, name: str, data: Dict[str, Any]) -> None:
+        frame = ttk.Frame(notebook)
+        notebook.add(frame, text=name)
 
-            text_widget.insert(tk.END, f"Анализ функции {name}:\n\n")
-            text_widget.insert(tk.END, f"Минимум: {data['min']:.4f}\n")
-            text_widget.insert(tk.END, f"Максимум: {data['max']:.4f}\n")
-            text_widget.insert(tk.END, f"Среднее: {data['mean']:.4f}\n")
-            text_widget.insert(tk.END, f"Медиана: {data['median']:.4f}\n")
-            text_widget.insert(tk.END, f"Стандартное отклонение: {data['std_dev']:.4f}\n\n")
+        text_widget = tk.Text(frame, wrap=tk.WORD, width=80, height=25)
+        text_widget.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
 
-            text_widget.insert(tk.END, f"Корни: {', '.join(map(str, data['roots'])) if data['roots'] else 'Не найдены'}\n")
-            text_widget.insert(tk.END, f"Экстремумы: {', '.join(map(str, data['extrema'])) if data['extrema'] else 'Не найдены'}\n")
-            text_widget.insert(tk.END, f"Точки перегиба: {', '.join(map(str, data['inflection_points'])) if data['inflection_points'] else 'Не найдены'}\n\n")
+        text_widget.insert(tk.END, f"Анализ функции {name}:\n\n")
+        text_widget.insert(tk.END, f"Минимум: {data['min']:.4f}\n")
+        text_widget.insert(tk.END, f"Максимум: {data['max']:.4f}\n")
+        text_widget.insert(tk.END, f"Среднее: {data['mean']:.4f}\n")
+        text_widget.insert(tk.END, f"Медиана: {data['median']:.4f}\n")
+        text_widget.insert(tk.END, f"Стандартное отклонение: {data['std_dev']:.4f}\n\n")
 
-            area_under_curve = data.get('area_under_curve')
-            if area_under_curve is not None:
-                area_text = f"{area_under_curve:.4f}"
-            else:
-                area_text = "Не удалось вычислить"
-            text_widget.insert(tk.END, f"Площадь под кривой: {area_text}\n")
+        text_widget.insert(tk.END, f"Корни: {', '.join(map(str, data['roots'])) if data['roots'] else 'Не найдены'}\n")
+        if 'discontinuities' in data:
+            text_widget.insert(tk.END, f"Разрывы (полюсы): {', '.join(map(str, data['discontinuities'])) if data['discontinuities'] else 'Не найдены'}\n")
+        text_widget.insert(tk.END, f"Экстремумы: {', '.join(map(str, data['extrema'])) if data['extrema'] else 'Не найдены'}\n")
+        text_widget.insert(tk.END, f"Точки перегиба: {', '.join(map(str, data['inflection_points'])) if data['inflection_points'] else 'Не найдены'}\n\n")
 
-            text_widget.insert(tk.END, f"Производная: {data['derivative'] if data['derivative'] is not None else 'Не удалось вычислить'}\n")
+        area_text = self.format_integral(data.get('area_under_curve'), data.get('area_error'))
+        text_widget.insert(tk.END, f"Площадь под кривой: {area_text}\n")
+        if 'absolute_area' in data:
+            text_widget.insert(tk.END, f"Площадь модуля функции: {self.format_integral(data['absolute_area'])}\n")
 
-            if 'arc_length' in data:
-                arc_length = data['arc_length']
-                if arc_length is not None:
-                    arc_length_text = f"{arc_length:.4f}"
-                else:
-                    arc_length_text = "Не удалось вычислить"
-                text_widget.insert(tk.END, f"Длина дуги: {arc_length_text}\n")
+        text_widget.insert(tk.END, f"Производная: {data['derivative'] if data['derivative'] is not None else 'Не удалось вычислить'}\n")
 
-            text_widget.config(state=tk.DISABLED)
+        if 'arc_length' in data:
+            arc_length_text = self.format_integral(data['arc_length'], data.get('arc_length_error'))
+            text_widget.insert(tk.END, f"Длина дуги: {arc_length_text}\n")
+
+        text_widget.config(state=tk.DISABLED)
+
+    def format_integral(self, value: Optional[float], error: Optional[float] = None) -> str:
+        if value is None:
+            return "Не удалось вычислить"
+        return f"{value:.4f} ± {error:.2g}" if error is not None else f"{value:.4f}"
 
-        save_button = ttk.Button(analysis_window, text="Сохранить результаты", command=lambda: self.save_analysis_results(results))
-        save_button.pack(pady=10)
-        
     def on_function_double_click(self, event):
         selection = self.function_listbox.curselection()
         if selection:
             index = selection[0]
-            function_info = self.function_listbox.get(index)
-            name = function_info.split(":")[0]
-            formula = function_info.split(":")[1].split("(")[0].strip().replace('^', '**')
-            color = function_info.split("(")[-1].strip(")")
-            
-            self.plotter.clear()
-            self.plotter.plot_function(self.calculator, name, formula, color)
-            self.plotter.redraw()
+            name = self.function_listbox.get(index).split(":")[0]
+            if name in self.calculator.functions:
+                self.isolated = None if self.isolated == name else name
+                self.render_scheduler.request()
             
-    def save_analysis_results(self, results: Dict[str, Dict[str, Any]]) -> None:
+    def export_samples(self) -> None:
+        functions = self.calculator.explicit_functions()
+        if not functions:
+            messagebox.showinfo("Экспорт", "Нет функций для экспорта.")
+            return
+        num = simpledialog.askinteger("Экспорт", "Число точек на видимом диапазоне x:", parent=self.master,
+                                      initialvalue=100000, minvalue=2)
+        if not num:
+            return
+        file_path = filedialog.asksaveasfilename(defaultextension=".npy",
+                                                 filetypes=[("NumPy", "*.npy"), ("NumPy archive", "*.npz"),
+                                                            ("CSV files", "*.csv")])
+        if not file_path:
+            return
+        x1, _, x2, _ = self.plotter.get_world_coords()
+        self.master.config(cursor="watch")
+        self.master.update_idletasks()
+        try:
+            export_samples(self.calculator, file_path, x1, x2, num, functions)
+        except (OSError, ValueError) as error:
+            messagebox.showerror("Ошибка", str(error))
+            return
+        finally:
+            self.master.config(cursor="")
+        messagebox.showinfo("Экспорт", f"Сохранено {num} точек для функций: {len(functions)}.")
+
+    def save_analysis_results(self, results: Dict[str, Dict[str, Any]],
+                              functions: Optional[Dict[str, Dict[str, Any]]] = None,
+                              world_coords: Optional[Tuple[float, float, float, float]] = None) -> None:
         file_path = filedialog.asksaveasfilename(defaultextension=".txt",
-                                                filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+                                                filetypes=[("Text files", "*.txt"), ("JSON files", "*.json"),
+                                                           ("All files", "*.*")])
+        if file_path.lower().endswith(".json"):
+            # Formulas and range as they were when the analysis ran, so the file can be reproduced.
+            export_analysis(results, file_path, functions, world_coords)
+            messagebox.showinfo("Сохранение", "Результаты анализа успешно сохранены.")
+            return
         if file_path:
             with open(file_path, 'w', encoding='utf-8') as file:
                 for name, data in results.items():
@@ -247,24 +507,20 @@ class GraphCalculatorGUI:
                     file.write(f"Медиана: {data['median']:.4f}\n")
                     file.write(f"Стандартное отклонение: {data['std_dev']:.4f}\n\n")
                     file.write(f"Корни: {', '.join(map(str, data['roots'])) if data['roots'] else 'Не найдены'}\n")
+                    if 'discontinuities' in data:
+                        file.write(f"Разрывы (полюсы): {', '.join(map(str, data['discontinuities'])) if data['discontinuities'] else 'Не найдены'}\n")
                     file.write(f"Экстремумы: {', '.join(map(str, data['extrema'])) if data['extrema'] else 'Не найдены'}\n")
                     file.write(f"Точки перегиба: {', '.join(map(str, data['inflection_points'])) if data['inflection_points'] else 'Не найдены'}\n\n")
                     
-                    area_under_curve = data.get('area_under_curve')
-                    if area_under_curve is not None:
-                        area_text = f"{area_under_curve:.4f}"
-                    else:
-                        area_text = "Не удалось вычислить"
+                    area_text = self.format_integral(data.get('area_under_curve'), data.get('area_error'))
                     file.write(f"Площадь под кривой: {area_text}\n")
+                    if 'absolute_area' in data:
+                        file.write(f"Площадь модуля функции: {self.format_integral(data['absolute_area'])}\n")
                     
                     file.write(f"Производная: {data['derivative'] if data['derivative'] is not None else 'Не удалось вычислить'}\n")
                     
                     if 'arc_length' in data:
-                        arc_length = data['arc_length']
-                        if arc_length is not None:
-                            arc_length_text = f"{arc_length:.4f}"
-                        else:
-                            arc_length_text = "Не удалось вычислить"
+                        arc_length_text = self.format_integral(data['arc_length'], data.get('arc_length_error'))
                         file.write(f"Длина дуги: {arc_length_text}\n")
                     
                     file.write("\n\n")
@@ -0,0 +1,82 @@
+from functools import wraps
+from typing import Any, Callable, Dict, Mapping, Optional
+import json
+import threading
+import time
+
+
+def _empty_stats() -> Dict[str, float]:
+    return {"calls": 0, "evaluations": 0, "total_seconds": 0.0, "last_seconds": 0.0, "max_seconds": 0.0}
+
+
+class Instrumentation:
+    def __init__(self):
+        self.enabled: bool = False
+        self.records: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, evaluations: int = 0) -> None:
+        with self._lock:
+            stats = self.records.setdefault(name, _empty_stats())
+            stats["calls"] += 1
+            stats["evaluations"] += evaluations
+            stats["total_seconds"] += seconds
+            stats["last_seconds"] = seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+    def call(self, name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        if not self.enabled:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name: Optional[str] = None, label: Optional[Callable[..., str]] = None) -> Callable:
+        def decorator(func: Callable) -> Callable:
+            record_name = name or func.__qualname__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                # Disabled instrumentation costs one attribute check per call.
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    key = f"{record_name}[{label(*args, **kwargs)}]" if label else record_name
+                    self.record(key, time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: dict(stats) for name, stats in self.records.items()}
+
+    def merge(self, records: Mapping[str, Mapping[str, float]]) -> None:
+        with self._lock:
+            for name, other in records.items():
+                stats = self.records.setdefault(name, _empty_stats())
+                stats["calls"] += other["calls"]
+                stats["evaluations"] += other["evaluations"]
+                stats["total_seconds"] += other["total_seconds"]
+                stats["last_seconds"] = other["last_seconds"]
+                stats["max_seconds"] = max(stats["max_seconds"], other["max_seconds"])
+
+    def get(self, name: str) -> Optional[Dict[str, float]]:
+        return self.records.get(name)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.records.clear()
+
+    def dump(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.snapshot(), file, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+profiler = Instrumentation()
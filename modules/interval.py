@@ -0,0 +1,222 @@
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+import ast
+import math
+import numpy as np
+from modules.root_finding import merge_roots
+
+
+class Interval(NamedTuple):
+    # Bounds enclose every defined value of the formula on [x_lo, x_hi].
+    # undefined: no point of the subrange is in the domain.
+    # partial: some points may be outside the domain.
+    # pole: the subrange may contain a point where the formula blows up.
+    lo: np.ndarray
+    hi: np.ndarray
+    undefined: np.ndarray
+    partial: np.ndarray
+    pole: np.ndarray
+
+    def contains_zero(self) -> np.ndarray:
+        return ~self.undefined & (self.lo <= 0) & (self.hi >= 0)
+
+    def non_finite(self) -> np.ndarray:
+        return self.undefined | ((self.lo == self.hi) & ~np.isfinite(self.lo))
+
+
+# Called with a (lo, hi) pair of arrays per variable: bounds(x_lo, x_hi) or
+# bounds(x_lo, x_hi, y_lo, y_hi).
+IntervalFunction = Callable[..., Interval]
+
+
+def _combine(lo: np.ndarray, hi: np.ndarray, *operands: Interval, partial: Optional[np.ndarray] = None,
+             undefined: Optional[np.ndarray] = None, pole: Optional[np.ndarray] = None) -> Interval:
+    result_undefined = np.logical_or.reduce([operand.undefined for operand in operands])
+    result_partial = np.logical_or.reduce([operand.partial for operand in operands])
+    result_pole = np.logical_or.reduce([operand.pole for operand in operands])
+    if undefined is not None:
+        result_undefined = result_undefined | undefined
+    if partial is not None:
+        result_partial = result_partial | partial
+    if pole is not None:
+        result_pole = result_pole | pole
+    # NaN bounds come from inf - inf or 0 * inf; widen them instead.
+    lo = np.where(np.isnan(lo), -np.inf, lo)
+    hi = np.where(np.isnan(hi), np.inf, hi)
+    return Interval(lo, hi, result_undefined, result_partial | result_undefined, result_pole)
+
+
+def _constant(value: float, shape) -> Interval:
+    full = np.full(shape, float(value))
+    false = np.zeros(shape, dtype=bool)
+    return Interval(full, full.copy(), false, false.copy(), false.copy())
+
+
+def _multiply(a: Interval, b: Interval) -> Interval:
+    products = np.stack((a.lo * b.lo, a.lo * b.hi, a.hi * b.lo, a.hi * b.hi))
+    products = np.where(np.isnan(products), 0.0, products)
+    return _combine(products.min(axis=0), products.max(axis=0), a, b)
+
+
+def _reciprocal(a: Interval) -> Interval:
+    straddles = (a.lo <= 0) & (a.hi >= 0)
+    lo = np.where(straddles, -np.inf, 1 / np.where(a.hi == 0, np.nan, a.hi))
+    hi = np.where(straddles, np.inf, 1 / np.where(a.lo == 0, np.nan, a.lo))
+    # Only the exact zero is outside the domain; the rest of the range is fine.
+    return _combine(lo, hi, a, partial=straddles, pole=straddles,
+                    undefined=(a.lo == 0) & (a.hi == 0))
+
+
+def _integer_power(a: Interval, exponent: int) -> Interval:
+    if exponent < 0:
+        return _reciprocal(_integer_power(a, -exponent))
+    if exponent == 0:
+        return _combine(np.ones_like(a.lo), np.ones_like(a.hi), a)
+    lo_power, hi_power = a.lo ** exponent, a.hi ** exponent
+    if exponent % 2:
+        return _combine(lo_power, hi_power, a)
+    straddles = (a.lo < 0) & (a.hi > 0)
+    lo = np.where(straddles, 0.0, np.minimum(lo_power, hi_power))
+    return _combine(lo, np.maximum(lo_power, hi_power), a)
+
+
+def _periodic_peak(lo: np.ndarray, hi: np.ndarray, phase: float, period: float) -> np.ndarray:
+    # True where lo <= phase + k * period <= hi for some integer k.
+    return np.ceil((lo - phase) / period) <= np.floor((hi - phase) / period)
+
+
+def _sin(a: Interval, shift: float = 0.0) -> Interval:
+    lo, hi = a.lo + shift, a.hi + shift
+    wide = ~np.isfinite(lo) | ~np.isfinite(hi) | (hi - lo >= 2 * math.pi)
+    safe_lo, safe_hi = np.where(wide, 0.0, lo), np.where(wide, 0.0, hi)
+    sin_lo, sin_hi = np.sin(safe_lo), np.sin(safe_hi)
+    result_lo = np.where(_periodic_peak(safe_lo, safe_hi, -math.pi / 2, 2 * math.pi), -1.0, np.minimum(sin_lo, sin_hi))
+    result_hi = np.where(_periodic_peak(safe_lo, safe_hi, math.pi / 2, 2 * math.pi), 1.0, np.maximum(sin_lo, sin_hi))
+    return _combine(np.where(wide, -1.0, result_lo), np.where(wide, 1.0, result_hi), a)
+
+
+def _tan(a: Interval) -> Interval:
+    wide = ~np.isfinite(a.lo) | ~np.isfinite(a.hi) | (a.hi - a.lo >= math.pi)
+    pole = wide | _periodic_peak(np.where(wide, 0.0, a.lo), np.where(wide, 0.0, a.hi), math.pi / 2, math.pi)
+    lo = np.where(pole, -np.inf, np.tan(np.where(pole, 0.0, a.lo)))
+    hi = np.where(pole, np.inf, np.tan(np.where(pole, 0.0, a.hi)))
+    return _combine(lo, hi, a, pole=pole)
+
+
+def _log(a: Interval) -> Interval:
+    undefined = a.hi <= 0
+    lo = np.where(a.lo <= 0, -np.inf, np.log(np.where(a.lo <= 0, 1.0, a.lo)))
+    hi = np.log(np.where(undefined, 1.0, a.hi))
+    return _combine(lo, hi, a, undefined=undefined, partial=a.lo <= 0)
+
+
+def _sqrt(a: Interval) -> Interval:
+    undefined = a.hi < 0
+    return _combine(np.sqrt(np.maximum(a.lo, 0.0)), np.sqrt(np.maximum(a.hi, 0.0)), a,
+                    undefined=undefined, partial=a.lo < 0)
+
+
+def _exp(a: Interval) -> Interval:
+    return _combine(np.exp(a.lo), np.exp(a.hi), a)
+
+
+def _abs(a: Interval) -> Interval:
+    straddles = (a.lo < 0) & (a.hi > 0)
+    low, high = np.abs(a.lo), np.abs(a.hi)
+    return _combine(np.where(straddles, 0.0, np.minimum(low, high)), np.maximum(low, high), a)
+
+
+def _power(a: Interval, b: Interval) -> Interval:
+    exponent = b.lo.flat[0] if b.lo.size else 0.0
+    if np.all(b.lo == exponent) and np.all(b.hi == exponent) and float(exponent).is_integer():
+        return _integer_power(a, int(exponent))
+    # Real powers are defined for non-negative bases only: a ** b = exp(b * log(a)).
+    result = _exp(_multiply(b, _log(a)))
+    return _combine(result.lo, result.hi, result, undefined=a.hi < 0, partial=a.lo < 0)
+
+
+class IntervalCompiler:
+    def __init__(self, constants: Dict[str, float]):
+        self.constants: Dict[str, float] = constants
+
+    def compile(self, formula: str, variables: Tuple[str, ...] = ("x",)) -> IntervalFunction:
+        tree = ast.parse(formula, mode="eval").body
+
+        def evaluate(*bounds: np.ndarray) -> Interval:
+            arrays = np.broadcast_arrays(*(np.asarray(bound, dtype=float) for bound in bounds))
+            false = np.zeros(arrays[0].shape, dtype=bool)
+            values = {name: Interval(arrays[2 * index], arrays[2 * index + 1], false, false, false)
+                      for index, name in enumerate(variables)}
+            with np.errstate(all="ignore"):
+                return self._node(tree, values)
+
+        return evaluate
+
+    def _node(self, node: ast.AST, values: Dict[str, Interval]) -> Interval:
+        shape = next(iter(values.values())).lo.shape
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return _constant(node.value, shape)
+        if isinstance(node, ast.Name):
+            if node.id in values:
+                return values[node.id]
+            if node.id in self.constants:
+                return _constant(self.constants[node.id], shape)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            operand = self._node(node.operand, values)
+            if isinstance(node.op, ast.UAdd):
+                return operand
+            return _combine(-operand.hi, -operand.lo, operand)
+        if isinstance(node, ast.BinOp):
+            left, right = self._node(node.left, values), self._node(node.right, values)
+            if isinstance(node.op, ast.Add):
+                return _combine(left.lo + right.lo, left.hi + right.hi, left, right)
+            if isinstance(node.op, ast.Sub):
+                return _combine(left.lo - right.hi, left.hi - right.lo, left, right)
+            if isinstance(node.op, ast.Mult):
+                return _multiply(left, right)
+            if isinstance(node.op, ast.Div):
+                return _multiply(left, _reciprocal(right))
+            if isinstance(node.op, ast.Pow):
+                return _power(left, right)
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            args = [self._node(arg, values) for arg in node.args]
+            name = node.func.id
+            if len(args) == 1:
+                unary = {"sin": _sin, "cos": lambda a: _sin(a, math.pi / 2), "tan": _tan, "log": _log,
+                         "exp": _exp, "sqrt": _sqrt, "abs": _abs}
+                if name in unary:
+                    return unary[name](args[0])
+            if name == "log" and len(args) == 2:
+                return _multiply(_log(args[0]), _reciprocal(_log(args[1])))
+        # Anything else is not modelled: claim nothing about it.
+        infinite = np.full(shape, np.inf)
+        true = np.ones(shape, dtype=bool)
+        return Interval(-infinite, infinite, np.zeros(shape, dtype=bool), true, true.copy())
+
+
+def locate_poles(bounds: IntervalFunction, func: Callable[[np.ndarray], np.ndarray], x_min: float, x_max: float,
+                 segments: int = 1024, tolerance: float = 1e-9, max_candidates: int = 4096) -> np.ndarray:
+    span = x_max - x_min
+    edges = np.linspace(x_min, x_max, segments + 1)
+    lo, hi = edges[:-1], edges[1:]
+    # Bisect only the pieces that interval evaluation cannot clear of a pole.
+    while True:
+        keep = bounds(lo, hi).pole
+        lo, hi = lo[keep], hi[keep]
+        if len(lo) == 0 or np.all(hi - lo <= tolerance * span):
+            break
+        if len(lo) > max_candidates:
+            return np.empty(0)
+        middle = (lo + hi) / 2
+        lo, hi = np.concatenate((lo, middle)), np.concatenate((middle, hi))
+    centers = merge_roots((lo + hi) / 2, 1e-6 * span)
+
+    # Interval bounds are pessimistic (sin(x)/x "may" have a pole at 0); keep
+    # only points where |f| really grows on the way in from at least one side.
+    near, far = 1e-7 * span, 1e-4 * span
+    with np.errstate(all="ignore"):
+        growing = np.zeros(len(centers), dtype=bool)
+        for side in (-1, 1):
+            inner = np.abs(func(centers + side * near))
+            outer = np.abs(func(centers + side * far))
+            growing |= (inner > 10 * outer) | (np.isinf(inner) & np.isfinite(outer))
+    return centers[growing]
@@ -0,0 +1,98 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+from modules.instrumentation import profiler
+
+Samples = Dict[str, Tuple[Any, Any]]
+
+
+class ProgressiveRenderer:
+    def __init__(self, widget, plotter: 'GraphPlotter', calculator: 'GraphCalculator', idle_ms: int = 150,
+                 poll_ms: int = 15, on_refined: Optional[Callable[[], None]] = None,
+                 functions: Optional[Callable[[], Mapping[str, Mapping[str, Any]]]] = None):
+        self.widget = widget
+        self.plotter: 'GraphPlotter' = plotter
+        self.calculator: 'GraphCalculator' = calculator
+        self.idle_ms: int = idle_ms
+        self.poll_ms: int = poll_ms
+        self.on_refined: Optional[Callable[[], None]] = on_refined
+        # The functions to draw; all of the calculator's unless the caller filters them.
+        self.functions: Callable[[], Mapping[str, Mapping[str, Any]]] = functions or (lambda: calculator.functions)
+        self.generation: int = 0
+        self.discarded: int = 0
+        self._idle: Optional[str] = None
+        self._poll: Optional[str] = None
+        self._future: Optional[Future] = None
+        # One worker: refinements queue up behind each other and stale ones
+        # bail out before computing anything.
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="refine")
+
+    def render(self) -> None:
+        # The preview is cheap enough for every frame of a drag or a zoom; the
+        # full-resolution pass waits until the viewport has been idle briefly.
+        self.generation += 1
+        self.cancel_idle()
+        profiler.call("GraphPlotter.preview", self.plotter.update_functions, self.calculator,
+                      self.functions(), True)
+        self.plotter.redraw()
+        self._idle = self.widget.after(self.idle_ms, self._start_refinement)
+
+    def refresh(self) -> None:
+        # The function list changed under an outstanding refinement: its
+        # snapshot is stale, so start over (the preview on screen is kept).
+        if self._idle is None and self._future is None:
+            return
+        self.generation += 1
+        self.cancel_idle()
+        self._start_refinement()
+
+    def cancel_idle(self) -> None:
+        if self._idle is not None:
+            self.widget.after_cancel(self._idle)
+            self._idle = None
+
+    def _start_refinement(self) -> None:
+        self._idle = None
+        generation = self.generation
+        functions = {name: dict(function_data) for name, function_data in self.functions().items()}
+        world_coords = self.plotter.world_coords
+        self._future = self._worker.submit(self._refine, generation, functions, world_coords)
+        if self._poll is None:
+            self._poll = self.widget.after(self.poll_ms, self._check_refinement)
+
+    def _refine(self, generation: int, functions: Mapping[str, Mapping[str, Any]],
+                world_coords: Tuple[float, float, float, float]) -> Optional[Tuple[int, Mapping[str, Mapping[str, Any]], Samples]]:
+        if generation != self.generation:
+            return None
+        return generation, functions, self.plotter.compute_samples(self.calculator, functions, world_coords)
+
+    def _check_refinement(self) -> None:
+        # Tk is not thread-safe: the worker only computes samples, and the
+        # artists are updated here, on the Tk thread.
+        self._poll = None
+        future = self._future
+        if future is None:
+            return
+        if not future.done():
+            self._poll = self.widget.after(self.poll_ms, self._check_refinement)
+            return
+        self._future = None
+        try:
+            refined = future.result()
+        except Exception:
+            refined = None
+        if refined is None or refined[0] != self.generation:
+            self.discarded += 1
+            return
+        _, functions, samples = refined
+        self.plotter.show_samples(functions, samples)
+        self.plotter.redraw()
+        if self.on_refined is not None:
+            self.on_refined()
+
+    def shutdown(self) -> None:
+        self.cancel_idle()
+        if self._poll is not None:
+            self.widget.after_cancel(self._poll)
+            self._poll = None
+        self.generation += 1
+        self._worker.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,94 @@
+from typing import List, Tuple
+import numpy as np
+
+WorldCoords = Tuple[float, float, float, float]
+
+
+def clip_polyline(x: np.ndarray, y: np.ndarray, x_min: float, x_max: float, y_min: float,
+                  y_max: float) -> Tuple[np.ndarray, np.ndarray]:
+    # Liang-Barsky on every segment at once. Segments leaving the box end on
+    # its boundary, invisible ones are dropped, and a NaN separates the
+    # pieces, so the result is one polyline ready for Line2D or split_runs.
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) < 2:
+        return np.empty(0), np.empty(0)
+    x0, y0, x1, y1 = x[:-1], y[:-1], x[1:], y[1:]
+    with np.errstate(all="ignore"):
+        dx, dy = x1 - x0, y1 - y0
+        t_in = np.zeros(len(x0))
+        t_out = np.ones(len(x0))
+        visible = np.isfinite(x0) & np.isfinite(y0) & np.isfinite(x1) & np.isfinite(y1)
+        for p, q in ((-dx, x0 - x_min), (dx, x_max - x0), (-dy, y0 - y_min), (dy, y_max - y0)):
+            t = q / p
+            t_in = np.where(p < 0, np.maximum(t_in, t), t_in)
+            t_out = np.where(p > 0, np.minimum(t_out, t), t_out)
+            # Parallel to this edge and outside it.
+            visible &= ~((p == 0) & (q < 0))
+        visible &= t_in <= t_out
+
+    index = np.flatnonzero(visible)
+    if len(index) == 0:
+        return np.empty(0), np.empty(0)
+    t0, t1 = t_in[index], t_out[index]
+    # A segment continues the previous one when both keep their shared point.
+    joined = np.zeros(len(index), dtype=bool)
+    joined[1:] = (np.diff(index) == 1) & (t1[:-1] == 1) & (t0[1:] == 0)
+    sizes = np.where(joined, 1, 3)
+    sizes[0] = 2
+    ends = np.cumsum(sizes) - 1
+    out_x = np.full(ends[-1] + 1, np.nan)
+    out_y = np.full(ends[-1] + 1, np.nan)
+    out_x[ends] = x0[index] + t1 * dx[index]
+    out_y[ends] = y0[index] + t1 * dy[index]
+    opened = ~joined
+    out_x[ends[opened] - 1] = x0[index[opened]] + t0[opened] * dx[index[opened]]
+    out_y[ends[opened] - 1] = y0[index[opened]] + t0[opened] * dy[index[opened]]
+    return out_x, out_y
+
+
+def decimate(x: np.ndarray, y: np.ndarray, x_min: float, x_max: float,
+             columns: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Within each pixel column of an unbroken run only the first, last,
+    # lowest and highest points can change the rasterised line, so about
+    # four points per column survive, however many samples came in.
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    count = len(x)
+    if count <= 4 * columns:
+        return x, y
+    with np.errstate(invalid="ignore"):
+        column = np.floor((x - x_min) / (x_max - x_min) * columns)
+    broken = ~np.isfinite(y)
+    first = np.ones(count, dtype=bool)
+    first[1:] = (column[1:] != column[:-1]) | broken[1:] | broken[:-1]
+    starts = np.flatnonzero(first)
+    sizes = np.diff(np.append(starts, count))
+    last = np.zeros(count, dtype=bool)
+    last[starts + sizes - 1] = True
+    keep = first | last
+    keep |= y == np.repeat(np.minimum.reduceat(y, starts), sizes)
+    keep |= y == np.repeat(np.maximum.reduceat(y, starts), sizes)
+    return x[keep], y[keep]
+
+
+def prepare_polyline(x: np.ndarray, y: np.ndarray, world_coords: WorldCoords, columns: int,
+                     margin: float = 0.01) -> Tuple[np.ndarray, np.ndarray]:
+    # Decimating first is exact (clipping does not change which pixels the
+    # kept points cover) and leaves clipping only a few points per column.
+    # The small margin keeps line caps at the edges of the view intact.
+    x1, y1, x2, y2 = world_coords
+    x, y = decimate(x, y, x1, x2, columns)
+    pad_x, pad_y = (x2 - x1) * margin, (y2 - y1) * margin
+    return clip_polyline(x, y, x1 - pad_x, x2 + pad_x, y1 - pad_y, y2 + pad_y)
+
+
+def split_runs(x: np.ndarray, y: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray]]:
+    breaks = np.flatnonzero(np.isnan(x) | np.isnan(y))
+    runs: List[Tuple[np.ndarray, np.ndarray]] = []
+    for run_x, run_y in zip(np.split(x, breaks), np.split(y, breaks)):
+        # Every run after the first starts with the NaN that ended the previous one.
+        finite = np.isfinite(run_x) & np.isfinite(run_y)
+        if finite.any():
+            runs.append((run_x[finite], run_y[finite]))
+    return runs
@@ -0,0 +1,40 @@
+from typing import Callable, Optional
+import time
+
+
+class RenderScheduler:
+    def __init__(self, widget, render: Callable[[], None], frame_ms: int = 16):
+        self.widget = widget
+        self.render = render
+        self.frame_ms: int = frame_ms
+        self.frames: int = 0
+        self.coalesced: int = 0
+        self._pending: Optional[str] = None
+        self._last_frame: float = 0.0
+
+    def request(self) -> None:
+        # Any number of requests before the next frame collapse into one render.
+        if self._pending is not None:
+            self.coalesced += 1
+            return
+        wait_ms = self.frame_ms - int((time.perf_counter() - self._last_frame) * 1000)
+        if wait_ms > 0:
+            self._pending = self.widget.after(wait_ms, self._on_frame)
+        else:
+            self._pending = self.widget.after_idle(self._on_frame)
+
+    def flush(self) -> None:
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._on_frame()
+
+    def cancel(self) -> None:
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._pending = None
+
+    def _on_frame(self) -> None:
+        self._pending = None
+        self._last_frame = time.perf_counter()
+        self.frames += 1
+        self.render()
@@ -0,0 +1,117 @@
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+import ast
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+WorldCoords = Tuple[float, float, float, float]
+
+# Bump when analysis results change meaning, so stale reports are not served.
+CACHE_VERSION = 2
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".graph_calculator", "analysis_cache.sqlite3")
+
+POINT_METRICS: Tuple[str, ...] = ("extrema", "inflection_points")
+
+
+def normalize_formula(formula: str) -> str:
+    # "x^2+1", "x ** 2 + 1" and "(x**2) + 1" are the same analysis.
+    formula = formula.replace("^", "**")
+    try:
+        return ast.unparse(ast.parse(formula.strip(), mode="eval"))
+    except SyntaxError:
+        return "".join(formula.split())
+
+
+class AnalysisResultCache:
+    def __init__(self, path: str = DEFAULT_PATH, max_entries: int = 10000):
+        self.path: str = path
+        self.max_entries: int = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Executor callbacks store results from a worker-management thread.
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, formula TEXT NOT NULL, "
+                "result TEXT NOT NULL, last_access REAL NOT NULL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS results_access ON results (last_access)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS results_formula ON results (formula)")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS derivatives (formula TEXT PRIMARY KEY, derivative TEXT NOT NULL)")
+
+    def key(self, formula: str, world_coords: WorldCoords, settings: Optional[Mapping[str, Any]] = None,
+            metrics: Optional[Sequence[str]] = None) -> str:
+        x_min, _, x_max, _ = world_coords
+        payload = [CACHE_VERSION, normalize_formula(formula), f"{x_min:.12g}", f"{x_max:.12g}",
+                   sorted((settings or {}).items()), sorted(metrics) if metrics is not None else None]
+        return hashlib.sha256(json.dumps(payload, default=str).encode("utf-8")).hexdigest()
+
+    def get(self, formula: str, world_coords: WorldCoords, settings: Optional[Mapping[str, Any]] = None,
+            metrics: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        key = self.key(formula, world_coords, settings, metrics)
+        with self._lock, self._connection:
+            row = self._connection.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._connection.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        result = json.loads(row[0])
+        for metric in POINT_METRICS:
+            if result.get(metric):
+                result[metric] = [tuple(point) for point in result[metric]]
+        return result
+
+    def put(self, formula: str, world_coords: WorldCoords, result: Mapping[str, Any],
+            settings: Optional[Mapping[str, Any]] = None, metrics: Optional[Sequence[str]] = None) -> None:
+        key = self.key(formula, world_coords, settings, metrics)
+        normalized = normalize_formula(formula)
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                                     (key, normalized, json.dumps(result), time.time()))
+            if result.get("derivative") is not None:
+                self._connection.execute("INSERT OR REPLACE INTO derivatives VALUES (?, ?)",
+                                         (normalized, result["derivative"]))
+            count = self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            if count > self.max_entries:
+                self._connection.execute(
+                    "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_access LIMIT ?)",
+                    (count - self.max_entries,))
+                # A derivative is kept only while some result of its formula is,
+                # so max_entries bounds both tables.
+                self._connection.execute(
+                    "DELETE FROM derivatives WHERE formula NOT IN (SELECT formula FROM results)")
+
+    def get_derivative(self, formula: str) -> Optional[str]:
+        # Derivatives do not depend on the viewport, so they survive a pan or
+        # zoom that misses the result cache.
+        with self._lock:
+            row = self._connection.execute("SELECT derivative FROM derivatives WHERE formula = ?",
+                                           (normalize_formula(formula),)).fetchone()
+        return row[0] if row is not None else None
+
+    def invalidate(self, formula: Optional[str] = None) -> None:
+        with self._lock, self._connection:
+            if formula is None:
+                self._connection.execute("DELETE FROM results")
+                self._connection.execute("DELETE FROM derivatives")
+            else:
+                normalized = normalize_formula(formula)
+                self._connection.execute("DELETE FROM results WHERE formula = ?", (normalized,))
+                self._connection.execute("DELETE FROM derivatives WHERE formula = ?", (normalized,))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,80 @@
+from typing import Callable, Optional, Tuple
+import numpy as np
+
+ArrayFunction = Callable[[np.ndarray], np.ndarray]
+
+
+def sign_change_brackets(y_values: np.ndarray, include_zero_runs: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    # Grid points where y == 0 exactly are roots already; bracketing them
+    # from both sides would find the same root twice.
+    with np.errstate(invalid="ignore"):
+        brackets = np.flatnonzero(y_values[:-1] * y_values[1:] < 0)
+    zero = y_values == 0
+    previous_zero = np.concatenate(([False], zero[:-1]))
+    next_zero = np.concatenate((zero[1:], [False]))
+    if include_zero_runs:
+        zeros = np.flatnonzero(zero & ~previous_zero)
+    else:
+        zeros = np.flatnonzero(zero & ~previous_zero & ~next_zero)
+    return brackets, zeros
+
+
+def solve_brackets(func: ArrayFunction, x1: np.ndarray, x2: np.ndarray, y1: np.ndarray, y2: np.ndarray,
+                   tolerance: float = 1e-6, max_iterations: int = 100) -> Tuple[np.ndarray, int]:
+    # Illinois regula falsi on all brackets at once: each iteration evaluates
+    # only the brackets that have not converged yet. fa is halved by the
+    # Illinois step, ga keeps the true value at a.
+    a, b, fa, fb = (np.array(values, dtype=float) for values in (x1, x2, y1, y2))
+    ga = fa.copy()
+    roots = np.full(len(a), np.nan)
+    active = np.isfinite(fa) & np.isfinite(fb) & (np.sign(fa) != np.sign(fb))
+    roots[fa == 0] = a[fa == 0]
+    roots[fb == 0] = b[fb == 0]
+    active &= (fa != 0) & (fb != 0)
+    evaluations = 0
+
+    for _ in range(max_iterations):
+        index = np.flatnonzero(active)
+        if len(index) == 0:
+            break
+        a_i, b_i, fa_i, fb_i = a[index], b[index], fa[index], fb[index]
+        c = (a_i * fb_i - b_i * fa_i) / (fb_i - fa_i)
+        c = np.where((c > np.minimum(a_i, b_i)) & (c < np.maximum(a_i, b_i)), c, (a_i + b_i) / 2)
+        fc = func(c)
+        evaluations += len(index)
+
+        failed = ~np.isfinite(fc)
+        opposite = fc * fb_i < 0
+        a[index] = np.where(opposite, b_i, a_i)
+        fa[index] = np.where(opposite, fb_i, fa_i / 2)
+        ga[index] = np.where(opposite, fb_i, ga[index])
+        b[index], fb[index] = c, fc
+
+        converged = ~failed & ((fc == 0) | (np.abs(b[index] - a[index]) <= tolerance))
+        # The end of the final bracket closer to zero: reject_poles compares
+        # |f| there with the bracket ends.
+        closer = np.where(np.abs(ga[index]) < np.abs(fc), a[index], c)
+        roots[index[converged]] = closer[converged]
+        active[index[converged | failed]] = False
+
+    return roots, evaluations
+
+
+def reject_poles(func: ArrayFunction, roots: np.ndarray, y1: np.ndarray, y2: np.ndarray,
+                 possible_pole: Optional[np.ndarray] = None) -> np.ndarray:
+    # A sign change across a pole converges onto the pole, where |f| ends up
+    # above the smaller bracket end (the larger one may sit right next to the
+    # pole); at a genuine root it ends up below both.
+    with np.errstate(invalid="ignore"):
+        pole = np.abs(func(roots)) > np.minimum(np.abs(y1), np.abs(y2))
+    if possible_pole is not None:
+        pole &= possible_pole
+    return np.where(pole, np.nan, roots)
+
+
+def merge_roots(roots: np.ndarray, tolerance: float) -> np.ndarray:
+    roots = np.sort(roots[np.isfinite(roots)])
+    if len(roots) < 2:
+        return roots
+    keep = np.concatenate(([True], np.diff(roots) > tolerance))
+    return roots[keep]
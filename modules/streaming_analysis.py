@@ -0,0 +1,252 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import math
+import numpy as np
+from modules.root_finding import sign_change_brackets, merge_roots
+from modules.instrumentation import profiler
+
+ArrayFunction = Callable[[np.ndarray], np.ndarray]
+
+# np.trapz was renamed to np.trapezoid in NumPy 2.0.
+_trapezoid = getattr(np, "trapezoid", None) or np.trapz
+
+
+class RunningStatistics:
+    def __init__(self):
+        self.count: int = 0
+        self.mean: float = 0.0
+        self.m2: float = 0.0
+        self.minimum: float = math.inf
+        self.maximum: float = -math.inf
+
+    def update(self, values: np.ndarray) -> None:
+        # Welford's update, generalised to merge a whole chunk at a time
+        # (Chan et al.), so the running variance stays numerically stable.
+        count = len(values)
+        if count == 0:
+            return
+        chunk_mean = float(np.mean(values))
+        chunk_m2 = float(np.sum((values - chunk_mean) ** 2))
+        total = self.count + count
+        delta = chunk_mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += chunk_m2 + delta ** 2 * self.count * count / total
+        self.count = total
+        self.minimum = min(self.minimum, float(np.min(values)))
+        self.maximum = max(self.maximum, float(np.max(values)))
+
+    @property
+    def std_dev(self) -> float:
+        return math.sqrt(self.m2 / self.count) if self.count else math.nan
+
+
+class QuantileSketch:
+    # KLL-style compactor hierarchy: a full level is sorted and every other
+    # item (random offset) is promoted with doubled weight, so memory stays
+    # O(capacity * log(n)) while rank error stays around 1/capacity.
+    def __init__(self, capacity: int = 4096, seed: int = 0):
+        self.capacity: int = capacity
+        self.levels: List[np.ndarray] = []
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray) -> None:
+        level = 0
+        while len(values):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            merged = np.concatenate((self.levels[level], values))
+            if len(merged) <= self.capacity:
+                self.levels[level] = merged
+                return
+            merged.sort()
+            keep = len(merged) % 2
+            self.levels[level] = merged[len(merged) - keep:]
+            values = merged[:len(merged) - keep][self._rng.integers(2)::2]
+            level += 1
+
+    def quantile(self, q: float) -> float:
+        if not self.levels:
+            return math.nan
+        values = np.concatenate(self.levels)
+        if len(values) == 0:
+            return math.nan
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values)
+        cumulative = np.cumsum(weights[order])
+        index = int(np.searchsorted(cumulative, q * cumulative[-1]))
+        return float(values[order][min(index, len(values) - 1)])
+
+
+class GridScan:
+    # Carries the last two samples of the previous chunk, so sign changes and
+    # local extrema that straddle a chunk edge are still seen exactly once.
+    def __init__(self):
+        self.x_tail: np.ndarray = np.empty(0)
+        self.y_tail: np.ndarray = np.empty(0)
+
+    def extend(self, x_values: np.ndarray, y_values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, int]:
+        offset = len(self.x_tail)
+        x_all = np.concatenate((self.x_tail, x_values))
+        y_all = np.concatenate((self.y_tail, y_values))
+        self.x_tail, self.y_tail = x_all[-2:], y_all[-2:]
+        return x_all, y_all, offset
+
+
+class TrapezoidAccumulator:
+    def __init__(self):
+        self.fine: float = 0.0
+        self.coarse: float = 0.0
+        self._last: Tuple[np.ndarray, np.ndarray] = (np.empty(0), np.empty(0))
+        self._last_even: Tuple[np.ndarray, np.ndarray] = (np.empty(0), np.empty(0))
+
+    def update(self, x_values: np.ndarray, y_values: np.ndarray, start: int) -> None:
+        y_values = np.where(np.isfinite(y_values), y_values, 0.0)
+        x_all = np.concatenate((self._last[0], x_values))
+        y_all = np.concatenate((self._last[1], y_values))
+        self.fine += float(_trapezoid(y_all, x_all))
+        self._last = (x_all[-1:], y_all[-1:])
+
+        even = (start + np.arange(len(x_values))) % 2 == 0
+        x_even = np.concatenate((self._last_even[0], x_values[even]))
+        y_even = np.concatenate((self._last_even[1], y_values[even]))
+        if len(x_even) > 1:
+            self.coarse += float(_trapezoid(y_even, x_even))
+        if len(x_even):
+            self._last_even = (x_even[-1:], y_even[-1:])
+
+    def result(self) -> Tuple[float, float]:
+        # Richardson extrapolation of the two trapezoid sums (Simpson's rule).
+        return self.fine + (self.fine - self.coarse) / 3, abs(self.fine - self.coarse) / 3
+
+
+class StreamingAnalyzer:
+    def __init__(self, analyzer: 'GraphAnalyzer'):
+        self.analyzer: 'GraphAnalyzer' = analyzer
+        self.samples: int = analyzer.samples
+        self.chunk_size: int = analyzer.chunk_size
+
+    def chunks(self) -> Iterator[Tuple[int, np.ndarray]]:
+        x_min, _, x_max, _ = self.analyzer.world_coords
+        step = (x_max - x_min) / (self.samples - 1) if self.samples > 1 else 0.0
+        for start in range(0, self.samples, self.chunk_size):
+            stop = min(start + self.chunk_size, self.samples)
+            yield start, x_min + step * np.arange(start, stop, dtype=float)
+
+    def analyze_function(self, formula: str, metrics: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        from modules.graph_analysis import METRICS
+        from modules.symbolic import get_symbolic
+
+        analyzer = self.analyzer
+        selected = set(METRICS if metrics is None else metrics)
+        x_min, _, x_max, _ = analyzer.world_coords
+        grid_integrals = analyzer.integration_mode == "grid"
+        function = analyzer.calculator.compile(formula)
+        bounds = analyzer.calculator.compile_interval(formula)
+
+        first_derivative: Optional[ArrayFunction] = None
+        second_derivative: Optional[ArrayFunction] = None
+        if "inflection_points" in selected:
+            try:
+                second_derivative = get_symbolic(formula).second_derivative_function
+            except Exception:
+                second_derivative = None
+        if grid_integrals and selected & {"arc_length", "arc_length_error"}:
+            try:
+                first_derivative = get_symbolic(formula).first_derivative_function
+            except Exception:
+                first_derivative = None
+
+        statistics = RunningStatistics()
+        sketch = QuantileSketch()
+        value_scan, curvature_scan = GridScan(), GridScan()
+        area, absolute_area, arc_length = TrapezoidAccumulator(), TrapezoidAccumulator(), TrapezoidAccumulator()
+        roots: List[np.ndarray] = []
+        extrema: List[np.ndarray] = []
+        inflections: List[np.ndarray] = []
+
+        for start, x_values in self.chunks():
+            y_values = analyzer.safe_calculate(formula, x_values)
+            finite = y_values[np.isfinite(y_values)]
+            statistics.update(finite)
+            if "median" in selected:
+                sketch.update(finite)
+
+            x_all, y_all, offset = value_scan.extend(x_values, y_values)
+            if "roots" in selected:
+                roots.append(self._roots(function, x_all, y_all, offset, True, bounds))
+            if "extrema" in selected:
+                left, middle, right = y_all[:-2], y_all[1:-1], y_all[2:]
+                centers = np.flatnonzero(((left < middle) & (middle > right)) | ((left > middle) & (middle < right))) + 1
+                extrema.append(np.column_stack((x_all[centers], y_all[centers])))
+            if second_derivative is not None:
+                x_curve, y_curve, curve_offset = curvature_scan.extend(x_values, second_derivative(x_values))
+                inflections.append(self._roots(second_derivative, x_curve, y_curve, curve_offset, False))
+            if grid_integrals:
+                area.update(x_values, y_values, start)
+                absolute_area.update(x_values, np.abs(y_values), start)
+                if first_derivative is not None:
+                    arc_length.update(x_values, np.sqrt(1 + first_derivative(x_values) ** 2), start)
+
+        if statistics.count == 0:
+            return None
+
+        def integral(accumulator: TrapezoidAccumulator, fallback: Callable[[], Tuple[Optional[float], Optional[float]]],
+                     available: bool = True) -> Tuple[Optional[float], Optional[float]]:
+            if not grid_integrals:
+                return fallback()
+            if not available:
+                return None, None
+            value, error = accumulator.result()
+            return (round(value, 4), float(f"{error:.3g}")) if math.isfinite(value) else (None, None)
+
+        area_result = lambda: integral(area, lambda: analyzer.area_with_error(formula, x_min, x_max))
+        arc_result = lambda: integral(arc_length, lambda: analyzer.arc_length_with_error(formula, x_min, x_max),
+                                      first_derivative is not None)
+
+        def inflection_points() -> Optional[List[Tuple[float, float]]]:
+            if second_derivative is None:
+                return None
+            x_points = merge_roots(np.concatenate(inflections), 1e-6)
+            y_points = analyzer.calculator.evaluate(formula, x_points)
+            finite_points = np.isfinite(y_points)
+            points = list(zip(np.round(x_points[finite_points], 4).tolist(), np.round(y_points[finite_points], 4).tolist()))
+            return points or None
+
+        def extrema_points() -> Optional[List[Tuple[float, float]]]:
+            points = np.concatenate(extrema) if extrema else np.empty((0, 2))
+            result = [tuple(point) for point in np.round(points, 4).tolist()]
+            return result or None
+
+        def root_points() -> Optional[List[float]]:
+            merged = merge_roots(np.concatenate(roots), 1e-6)
+            return np.round(merged, 4).tolist() if len(merged) else None
+
+        calculations: Dict[str, Callable[[], Any]] = {
+            "min": lambda: statistics.minimum,
+            "max": lambda: statistics.maximum,
+            "mean": lambda: statistics.mean,
+            "median": lambda: sketch.quantile(0.5),
+            "std_dev": lambda: statistics.std_dev,
+            "roots": root_points,
+            "discontinuities": lambda: analyzer.find_discontinuities(formula, x_min, x_max),
+            "extrema": extrema_points,
+            "inflection_points": inflection_points,
+            "area_under_curve": lambda: area_result()[0],
+            "absolute_area": lambda: integral(absolute_area, lambda: analyzer.area_with_error(formula, x_min, x_max, True))[0],
+            "area_error": lambda: area_result()[1],
+            "derivative": lambda: analyzer.get_derivative(formula),
+            "arc_length": lambda: arc_result()[0],
+            "arc_length_error": lambda: arc_result()[1],
+        }
+        return {metric: profiler.call(f"GraphAnalyzer.{metric}", calculate)
+                for metric, calculate in calculations.items() if metric in selected}
+
+    def _roots(self, func: ArrayFunction, x_all: np.ndarray, y_all: np.ndarray, offset: int,
+               include_zero_runs: bool, bounds: Optional['IntervalFunction'] = None) -> np.ndarray:
+        brackets, zeros = sign_change_brackets(y_all, include_zero_runs)
+        # With a carried tail, the bracket between the two tail samples and
+        # the tail samples themselves were handled with the previous chunk.
+        brackets = brackets[brackets >= offset - 1] if offset else brackets
+        zeros = zeros[zeros >= offset]
+        refined = self.analyzer.refine_brackets(func, x_all[brackets], x_all[brackets + 1],
+                                                y_all[brackets], y_all[brackets + 1], bounds=bounds)
+        return np.concatenate((refined[np.isfinite(refined)], x_all[zeros]))
@@ -0,0 +1,68 @@
+from functools import cached_property
+from typing import Callable, TYPE_CHECKING
+import numpy as np
+from modules.cache import LRUCache
+
+# sympy takes a noticeable part of a second to import, so it is only loaded
+# when the first symbolic artifact is actually built.
+if TYPE_CHECKING:
+    from sympy import Expr, Symbol
+
+ArrayFunction = Callable[[np.ndarray], np.ndarray]
+
+_artifacts = LRUCache(max_entries=256)
+
+
+def array_function(expr: "Expr", x: "Symbol") -> ArrayFunction:
+    from sympy import lambdify
+
+    compiled = lambdify(x, expr, "numpy", cse=True)
+
+    def evaluate(x_values: np.ndarray) -> np.ndarray:
+        x_array = np.asarray(x_values, dtype=float)
+        with np.errstate(all="ignore"):
+            try:
+                result = np.asarray(compiled(x_array), dtype=float)
+            except (ArithmeticError, TypeError, ValueError):
+                return np.full(x_array.shape, np.nan)
+        return np.broadcast_to(result, x_array.shape).copy() if result.shape != x_array.shape else result
+
+    return evaluate
+
+
+class SymbolicArtifacts:
+    def __init__(self, formula: str):
+        from sympy import E, Symbol, sympify
+
+        self.formula: str = formula
+        self.x: "Symbol" = Symbol('x')
+        # GraphCalculator treats "e" as Euler's number, sympify as a free symbol.
+        self.expr: "Expr" = sympify(formula, locals={"e": E, "x": self.x})
+
+    @cached_property
+    def first_derivative(self) -> "Expr":
+        return self.expr.diff(self.x)
+
+    @cached_property
+    def second_derivative(self) -> "Expr":
+        return self.first_derivative.diff(self.x)
+
+    @cached_property
+    def first_derivative_function(self) -> ArrayFunction:
+        return array_function(self.first_derivative, self.x)
+
+    @cached_property
+    def second_derivative_function(self) -> ArrayFunction:
+        return array_function(self.second_derivative, self.x)
+
+
+def get_symbolic(formula: str) -> SymbolicArtifacts:
+    artifacts = _artifacts.get(formula)
+    if artifacts is None:
+        artifacts = SymbolicArtifacts(formula)
+        _artifacts.put(formula, artifacts)
+    return artifacts
+
+
+def clear_symbolic_cache() -> None:
+    _artifacts.clear()
@@ -0,0 +1,188 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+import math
+import threading
+import numpy as np
+from modules.adaptive_sampling import adaptive_sample
+from modules.cache import estimate_size
+from modules.interval import IntervalFunction
+
+ArrayFunction = Callable[[np.ndarray], np.ndarray]
+Tile = Tuple[np.ndarray, np.ndarray]
+
+
+def _power_of_two_at_least(value: float) -> int:
+    return 2 ** max(int(math.ceil(math.log2(max(value, 1e-300)))), -1074)
+
+
+class TileCache:
+    # The x axis is cut into tiles of width 2**level, chosen so that a view
+    # spans about tiles_per_view tiles. Tiles at one level line up no matter
+    # where the view is, so a pan only has to compute the tiles it exposes.
+    def __init__(self, tiles_per_view: int = 8, keep_tiles: int = 24, max_groups: int = 64,
+                 prefetch_tiles: int = 2, band_heights: int = 2, tolerance: float = 1e-3,
+                 max_bytes: Optional[int] = None):
+        self.tiles_per_view: int = tiles_per_view
+        self.band_heights: int = band_heights
+        self.tolerance: float = tolerance
+        self.keep_tiles: int = keep_tiles
+        self.max_groups: int = max_groups
+        self.max_bytes: Optional[int] = max_bytes
+        self.prefetch_tiles: int = prefetch_tiles
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.current_bytes: int = 0
+        self._groups: "OrderedDict[Hashable, Dict[int, Tile]]" = OrderedDict()
+        # Every cached tile by (group, index), least recently used first.
+        self._sizes: "OrderedDict[Tuple[Hashable, int], int]" = OrderedDict()
+        self._centers: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+        self._prefetcher: Optional[ThreadPoolExecutor] = None
+
+    def layout(self, x_min: float, x_max: float, points: int) -> Tuple[float, int]:
+        width = _power_of_two_at_least((x_max - x_min) / self.tiles_per_view)
+        # Whole view keeps at least the requested resolution.
+        per_tile = _power_of_two_at_least(points * width / (x_max - x_min))
+        return float(width), max(int(per_tile), 2)
+
+    def y_band(self, y_min: float, y_max: float) -> Tuple[float, float, float]:
+        # Adaptive tiles are refined against the view height (a power of two,
+        # like the tile width) inside a band aligned to a grid of view
+        # heights, not against the exact y window: vertical pans that stay in
+        # the band reuse every tile.
+        height = float(_power_of_two_at_least(y_max - y_min))
+        size = height * self.band_heights
+        index = math.floor((y_min + y_max) / 2 / size)
+        return (index - 1) * size, (index + 2) * size, height
+
+    def sample(self, evaluator: ArrayFunction, formula: str, x_min: float, x_max: float, points: int,
+               y_range: Optional[Tuple[float, float]] = None,
+               bounds: Optional[IntervalFunction] = None) -> Tuple[np.ndarray, np.ndarray]:
+        width, per_tile = self.layout(x_min, x_max, points)
+        first, last = math.floor(x_min / width), math.floor(x_max / width)
+        band = self.y_band(*y_range) if y_range is not None else None
+        group = (formula, width, per_tile, band)
+        tiles = self._tiles(group, evaluator, range(first, last + 1), width, per_tile, band, bounds)
+
+        center = (first + last) / 2
+        previous = self._centers.get(group)
+        self._centers[group] = center
+        if previous is not None and center != previous and self.prefetch_tiles:
+            ahead = (range(last + 1, last + 1 + self.prefetch_tiles) if center > previous
+                     else range(first - self.prefetch_tiles, first))
+            self._prefetch(group, evaluator, ahead, width, per_tile, band, bounds)
+        self._evict_far(group, center)
+
+        x_values = np.concatenate([tile[0] for tile in tiles])
+        y_values = np.concatenate([tile[1] for tile in tiles])
+        x_values.setflags(write=False)
+        y_values.setflags(write=False)
+        return x_values, y_values
+
+    def _tiles(self, group: Hashable, evaluator: ArrayFunction, indices: range, width: float, per_tile: int,
+               band: Optional[Tuple[float, float, float]], bounds: Optional[IntervalFunction] = None) -> List[Tile]:
+        with self._lock:
+            self._groups.setdefault(group, {})
+            self._groups.move_to_end(group)
+            while len(self._groups) > self.max_groups:
+                self._drop_group(next(iter(self._groups)))
+            cached = self._groups[group]
+            found = {index: cached[index] for index in indices if index in cached}
+            for index in found:
+                self._sizes.move_to_end((group, index))
+            self.hits += len(found)
+        missing = [index for index in indices if index not in found]
+        if missing:
+            computed = self._compute(evaluator, missing, width, per_tile, band, bounds)
+            with self._lock:
+                self.misses += len(computed)
+                # The group may have been evicted while the tiles were computed.
+                cached = self._groups.setdefault(group, {})
+                for index, tile in computed.items():
+                    self._store(group, cached, index, tile)
+                self._shrink()
+            found.update(computed)
+        return [found[index] for index in indices]
+
+    def _store(self, group: Hashable, cached: Dict[int, Tile], index: int, tile: Tile) -> None:
+        key = (group, index)
+        self.current_bytes -= self._sizes.pop(key, 0)
+        cached[index] = tile
+        self._sizes[key] = estimate_size(tile)
+        self.current_bytes += self._sizes[key]
+
+    def _drop(self, group: Hashable, index: int) -> None:
+        del self._groups[group][index]
+        self.current_bytes -= self._sizes.pop((group, index))
+
+    def _drop_group(self, group: Hashable) -> None:
+        for index in list(self._groups[group]):
+            self._drop(group, index)
+        del self._groups[group]
+        self._centers.pop(group, None)
+
+    def _shrink(self) -> None:
+        while self.max_bytes is not None and self.current_bytes > self.max_bytes and self._sizes:
+            group, index = next(iter(self._sizes))
+            self._drop(group, index)
+            self.evictions += 1
+
+    def _compute(self, evaluator: ArrayFunction, indices: List[int], width: float, per_tile: int,
+                 band: Optional[Tuple[float, float, float]], bounds: Optional[IntervalFunction] = None) -> Dict[int, Tile]:
+        result: Dict[int, Tile] = {}
+        if bounds is not None:
+            # Tiles proven to lie entirely outside the domain are not sampled.
+            starts = np.asarray(indices, dtype=float) * width
+            empty = bounds(starts, starts + width).non_finite()
+            for index in np.asarray(indices)[empty].tolist():
+                result[index] = (np.array([index * width, (index + 1) * width]), np.full(2, np.nan))
+            indices = [index for index in indices if index not in result]
+            if not indices:
+                return result
+        if band is not None:
+            y_min, y_max, height = band
+            # The tolerance stays relative to the view height, not to the band.
+            tolerance = self.tolerance * height / (y_max - y_min)
+            for index in indices:
+                x_tile, y_tile, _ = adaptive_sample(evaluator, index * width, (index + 1) * width,
+                                                    y_min, y_max, per_tile, tolerance=tolerance)
+                result[index] = (x_tile, y_tile)
+            return result
+        # Uniform tiles are half-open, [start, start + width), so neighbours
+        # never repeat a point; all missing tiles go through one evaluation.
+        offsets = np.arange(per_tile) * (width / per_tile)
+        x_values = (np.asarray(indices, dtype=float)[:, None] * width + offsets[None, :])
+        y_values = evaluator(x_values.ravel()).reshape(x_values.shape)
+        result.update({index: (x_values[row], y_values[row]) for row, index in enumerate(indices)})
+        return result
+
+    def _prefetch(self, group: Hashable, evaluator: ArrayFunction, indices: range, width: float, per_tile: int,
+                  band: Optional[Tuple[float, float, float]], bounds: Optional[IntervalFunction] = None) -> None:
+        if self._prefetcher is None:
+            self._prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tile-prefetch")
+        self._prefetcher.submit(self._tiles, group, evaluator, indices, width, per_tile, band, bounds)
+
+    def _evict_far(self, group: Hashable, center: float) -> None:
+        with self._lock:
+            cached = self._groups.get(group, {})
+            for index in [index for index in cached if abs(index - center) > self.keep_tiles]:
+                self._drop(group, index)
+
+    def resize(self, max_bytes: Optional[int]) -> None:
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._shrink()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._groups.clear()
+            self._centers.clear()
+            self._sizes.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"groups": len(self._groups), "tiles": len(self._sizes), "bytes": self.current_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}